@@ -6,14 +6,14 @@ from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import settings
-from src.database import get_db
+from src.database import get_db, get_read_db, mark_recent_write, UnitOfWorkRoute
 from src.crud.user import get_user_by_login, create_user as crud_create_user
 from src.schemas.user import UserCreate, UserResponse
 from src.utils import verify_password
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -40,7 +40,7 @@ async def authenticate_user(db: AsyncSession, login: str, password: str):
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Dependency для получения текущего аутентифицированного пользователя из JWT токена"""
     credentials_exception = HTTPException(
@@ -57,11 +57,25 @@ async def get_current_user(
         raise credentials_exception
     
     user = await get_user_by_login(db, login=login)
+    # Соединение сессии чтения сразу возвращается в пул: обработчики записи работают
+    # через get_db и иначе держали бы на запрос два соединения одновременно
+    await db.close()
     if user is None:
         raise credentials_exception
     return user
 
 
+async def get_admin_user(current_user=Depends(get_current_user)):
+    """Dependency для служебных эндпоинтов: только пользователи из ADMIN_LOGINS"""
+    admin_logins = {login.strip() for login in settings.ADMIN_LOGINS.split(",") if login.strip()}
+    if current_user.login not in admin_logins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
+
+
 @router.post("/token")
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
@@ -101,6 +115,8 @@ async def register(
         )
     
     user = await crud_create_user(db, user_create)
+    # Новый пользователь еще может отсутствовать на реплике
+    mark_recent_write(user.login)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.login}, expires_delta=access_token_expires
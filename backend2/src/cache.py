@@ -0,0 +1,118 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+class LRUCache:
+    """
+    Кэш в памяти воркера с ограничением размера (вытесняются давно не читавшиеся записи)
+    и временем жизни записей.
+
+    Значение, загруженное во время инвалидации, в кэш не кладется: загрузка могла
+    прочитать данные до COMMIT изменений и вернуть в кэш устаревшее значение.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._generation = 0
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        self.misses += 1
+        generation = self._generation
+        value = await load()
+        if self.max_size > 0 and generation == self._generation:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        self._generation += 1
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def get_many_or_load(
+        self,
+        keys: Iterable[Hashable],
+        load_many: Callable[[list], Awaitable[dict]]
+    ) -> dict:
+        """
+        Значения для нескольких ключей: недостающие загружаются одним вызовом
+        load_many(missing_keys) -> {key: value}.
+        """
+        values = {}
+        missing = []
+        now = time.monotonic()
+        for key in dict.fromkeys(keys):
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                values[key] = entry[0]
+            else:
+                missing.append(key)
+        if not missing:
+            return values
+
+        self.misses += len(missing)
+        generation = self._generation
+        loaded = await load_many(missing)
+        if self.max_size > 0 and generation == self._generation:
+            expires_at = time.monotonic() + self.ttl
+            for key in missing:
+                self._entries[key] = (loaded[key], expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        values.update(loaded)
+        return values
+
+    def invalidate_in_transaction(self, db: AsyncSession, keys: Iterable[Hashable]) -> None:
+        """
+        Сбрасывает ключи сразу и еще раз после COMMIT/ROLLBACK транзакции db:
+        параллельный запрос мог успеть закэшировать значение до COMMIT.
+        """
+        keys = set(keys)
+        self.invalidate(keys)
+        pending = db.info.setdefault("cache_invalidations", {})
+        pending.setdefault(self, set()).update(keys)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+        }
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_after_transaction(session):
+    for cache, keys in session.info.pop("cache_invalidations", {}).items():
+        cache.invalidate(keys)
@@ -6,6 +6,10 @@ from functools import lru_cache
 class Settings(BaseSettings): 
     # Database URL
     DATABASE_URL: str
+    # URL реплики только для чтения (если не задан — все читается с основной БД)
+    DATABASE_REPLICA_URL: Optional[str] = None
+    # Сколько секунд после изменений пользователя его чтения идут в основную БД
+    REPLICA_READ_YOUR_WRITES_SECONDS: float = 5.0
     
     # JWT settings
     SECRET_KEY: str
@@ -15,6 +19,41 @@ class Settings(BaseSettings):
     # CORS settings (может быть строкой или списком)
     CORS_ORIGINS: Union[str, list] = "*"
 
+    # Логины (через запятую), которым доступны служебные эндпоинты /system; пусто — никому
+    ADMIN_LOGINS: str = ""
+
+    # Настройки пула соединений с БД (на один воркер)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP: int = 2
+
+    # Предупреждение о N+1: одна форма SQL запроса выполнилась больше N раз за HTTP запрос
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 10
+
+    # Журнал медленных запросов (0 — выключен).
+    # Каждый воркер пишет в свой файл: к имени добавляется pid (logs/slow_queries.<pid>.log)
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_LOG_PATH: str = "logs/slow_queries.log"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = 5
+    # Сколько EXPLAIN медленных запросов воркер выполняет одновременно;
+    # сверх этого запрос пишется в журнал без плана, чтобы не занимать пул
+    SLOW_QUERY_EXPLAIN_CONCURRENCY: int = 2
+
+    # Максимальный период (в днях) одного запроса свободного времени
+    AVAILABILITY_MAX_DAYS: int = 31
+
+    # Кэш занятости мастеров по дням в памяти воркера (0 — выключен)
+    OCCUPANCY_CACHE_SIZE: int = 10000
+    OCCUPANCY_CACHE_TTL_SECONDS: float = 30.0
+
+    # Кэш рабочих календарей мастеров в памяти воркера (0 — выключен)
+    SCHEDULE_CACHE_SIZE: int = 1000
+    SCHEDULE_CACHE_TTL_SECONDS: float = 60.0
+
     class Config:
         env_file = ".env"
         case_sensitive = True
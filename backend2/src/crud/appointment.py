@@ -1,19 +1,179 @@
+import base64
+import json
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Optional, List, Dict, Tuple
-from datetime import date
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.orm import aliased
+from typing import AsyncIterator, Optional, List, Dict, Tuple
+from datetime import date, timedelta
 
 from src.models.appointment import Appointment
 from src.models.user import User
 from src.models.service import Service
-from src.schemas.appointment import AppointmentCreate
-from src.crud.service import get_service_by_id
+from src.schemas.appointment import AppointmentCreate, AppointmentListFilter
+from src.crud.base import delete_by_id, update_rows_by_id
+from src.crud.loader import get_loader
+from src.crud.service import get_service_by_id, get_services_by_ids
+from src.crud.occupancy import (
+    free_start_quarters,
+    get_cached_master_day_mask,
+    get_master_day_mask,
+    lock_master_day_masks,
+    release_quarters,
+    reserve_quarters,
+    set_master_day_masks,
+)
+from src.crud.schedule import blocked_mask, get_working_calendars, get_working_mask
+from src.workday import QUARTERS_PER_DAY, quarter_to_time, quarters_mask
 
 
-async def get_all_appointments(db: AsyncSession) -> List[Appointment]:
-    """Получает все записи"""
-    result = await db.execute(select(Appointment))
-    return list(result.scalars().all())
+def exceeds_day_message(end_quarter: int) -> str:
+    """Сообщение об ошибке для записи, выходящей за конец сетки дня"""
+    return (
+        f"Appointment exceeds working hours. End quarter {end_quarter} is beyond "
+        f"{QUARTERS_PER_DAY} ({quarter_to_time(QUARTERS_PER_DAY)})"
+    )
+
+
+OUTSIDE_SCHEDULE_MESSAGE = "Appointment is outside the master's working hours"
+
+
+def _appointment_list_query():
+    """
+    Запрос записей со всеми полями AppointmentListResponse:
+    записи, услуги, клиент и мастер одним JOIN.
+    """
+    client = aliased(User)
+    master = aliased(User)
+    return (
+        select(
+            Appointment.id,
+            Appointment.date,
+            Appointment.quarter,
+            Appointment.status,
+            Appointment.is_paid,
+            Appointment.version,
+            master.full_name.label("master_full_name"),
+            Service.title.label("service_title"),
+            Service.price.label("service_price"),
+            client.full_name.label("client_full_name"),
+        )
+        .join(Service, Appointment.service_id == Service.id)
+        .join(client, Appointment.client_id == client.id)
+        .join(master, Appointment.master_id == master.id)
+    )
+
+
+def encode_appointment_cursor(appointment: dict) -> str:
+    """Курсор страницы: позиция (date, quarter, id) записи в непрозрачной строке"""
+    position = [appointment["date"].isoformat(), appointment["quarter"], appointment["id"]]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_appointment_cursor(cursor: str) -> Tuple[date, int, int]:
+    """Разбирает курсор encode_appointment_cursor; ValueError, если курсор поврежден"""
+    try:
+        day, quarter, appointment_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(day), int(quarter), int(appointment_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def _get_appointment_list(
+    db: AsyncSession,
+    query,
+    filters: Optional[AppointmentListFilter]
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Выполняет запрос списка записей с фильтрами и keyset пагинацией
+    по (date, quarter, id).
+
+    Returns:
+        (записи, курсор следующей страницы или None, если это последняя страница)
+    """
+    filters = filters or AppointmentListFilter()
+    if filters.status is not None:
+        query = query.where(Appointment.status == filters.status)
+    if filters.date_from is not None:
+        query = query.where(Appointment.date >= filters.date_from)
+    if filters.date_to is not None:
+        query = query.where(Appointment.date <= filters.date_to)
+    if filters.after is not None:
+        query = query.where(tuple_(Appointment.date, Appointment.quarter, Appointment.id) > filters.after)
+
+    query = query.order_by(Appointment.date, Appointment.quarter, Appointment.id)
+    if filters.limit is not None:
+        # Лишняя строка показывает, есть ли следующая страница
+        query = query.limit(filters.limit + 1)
+
+    result = await db.execute(query)
+    appointments = [dict(row) for row in result.mappings().all()]
+    if filters.limit is None or len(appointments) <= filters.limit:
+        return appointments, None
+    appointments = appointments[:filters.limit]
+    return appointments, encode_appointment_cursor(appointments[-1])
+
+
+async def get_all_appointments(
+    db: AsyncSession,
+    filters: Optional[AppointmentListFilter] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Получает записи с данными услуги, клиента и мастера одним запросом"""
+    return await _get_appointment_list(db, _appointment_list_query(), filters)
+
+
+# Колонки выгрузки записей в порядке CSV
+EXPORT_COLUMNS = [
+    "id",
+    "date",
+    "quarter",
+    "status",
+    "is_paid",
+    "client_id",
+    "client_full_name",
+    "master_id",
+    "master_full_name",
+    "service_id",
+    "service_title",
+    "service_price",
+]
+
+
+async def stream_appointments_export(
+    db: AsyncSession,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    master_id: Optional[int] = None,
+    batch_size: int = 1000
+) -> AsyncIterator[List[dict]]:
+    """
+    Выгрузка записей пачками по batch_size через серверный курсор:
+    в памяти одновременно находится только одна пачка, сколько бы записей ни было.
+    """
+    query = _appointment_list_query().add_columns(
+        Appointment.client_id, Appointment.service_id, Appointment.master_id
+    )
+    if date_from is not None:
+        query = query.where(Appointment.date >= date_from)
+    if date_to is not None:
+        query = query.where(Appointment.date <= date_to)
+    if master_id is not None:
+        query = query.where(Appointment.master_id == master_id)
+
+    result = await db.stream(
+        query.order_by(Appointment.date, Appointment.quarter, Appointment.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
+
+
+async def get_appointment_details(db: AsyncSession, appointment_id: int) -> Optional[dict]:
+    """Получает запись по ID с данными услуги, клиента и мастера одним запросом"""
+    result = await db.execute(
+        _appointment_list_query().where(Appointment.id == appointment_id)
+    )
+    row = result.mappings().one_or_none()
+    return dict(row) if row else None
 
 
 async def get_appointment_by_id(db: AsyncSession, appointment_id: int) -> Optional[Appointment]:
@@ -27,82 +187,310 @@ async def get_appointment_by_id(db: AsyncSession, appointment_id: int) -> Option
 async def create_appointment(
     db: AsyncSession, 
     appointment_create: AppointmentCreate
-) -> Appointment:
-    """Создает новую запись"""
+) -> Optional[Appointment]:
+    """
+    Создает новую запись и в той же транзакции занимает её кварталы у мастера.
+
+    Returns:
+        Созданная запись или None, если кварталы уже заняты
+        (параллельная запись успела раньше) или услуги нет
+    """
+    service = await get_service_by_id(db, appointment_create.service_id)
+    if not service:
+        return None
+    reserved = await reserve_quarters(
+        db,
+        service.master_id,
+        appointment_create.date,
+        appointment_create.quarter,
+        service.duration_quarters,
+    )
+    if not reserved:
+        return None
+
     db_appointment = Appointment(
         client_id=appointment_create.client_id,
         service_id=appointment_create.service_id,
+        master_id=service.master_id,
         date=appointment_create.date,
         quarter=appointment_create.quarter,
         status=appointment_create.status,
         is_paid=appointment_create.is_paid
     )
     db.add(db_appointment)
-    await db.commit()
-    await db.refresh(db_appointment)
+    await db.flush()  # COMMIT выполняет get_db в конце запроса
     return db_appointment
 
 
-async def update_appointment(
+async def bulk_create_appointments(
     db: AsyncSession,
-    appointment_id: int,
-    appointment_update: Dict
-) -> Optional[Appointment]:
-    """Обновляет запись"""
+    items: List[AppointmentCreate]
+) -> List[dict]:
+    """
+    Создает пакет записей в одной транзакции.
+
+    Клиенты, услуги и занятость всех затронутых дней мастеров загружаются заранее
+    (строки занятости блокируются до конца транзакции), каждая запись проверяется
+    в памяти — в том числе на пересечение с записями из этого же пакета, —
+    и принятые записи вставляются одним executemany.
+
+    Returns:
+        Результат по каждому элементу в исходном порядке:
+        {"index", "id", "error"}; id есть только у созданных записей
+    """
+    clients = await get_loader(db, User).load_many(item.client_id for item in items)
+    services = await get_services_by_ids(db, [item.service_id for item in items])
+    masks = await lock_master_day_masks(
+        db,
+        ((services[item.service_id].master_id, item.date) for item in items if item.service_id in services),
+    )
+    calendars = await get_working_calendars(
+        db,
+        {service.master_id for service in services.values()},
+        min(item.date for item in items),
+        max(item.date for item in items),
+    )
+
+    results = []
+    accepted = []
+    # Кварталы, занятые принятыми записями пакета
+    changed = {}
+    for index, item in enumerate(items):
+        error = None
+        service = services.get(item.service_id)
+        if item.client_id not in clients:
+            error = "Client not found"
+        elif service is None:
+            error = "Service not found"
+        else:
+            end_quarter = item.quarter + service.duration_quarters - 1
+            key = (service.master_id, item.date)
+            bits = quarters_mask(item.quarter, service.duration_quarters)
+            if end_quarter > QUARTERS_PER_DAY:
+                error = exceeds_day_message(end_quarter)
+            elif bits & ~calendars[service.master_id].working_mask(item.date):
+                error = OUTSIDE_SCHEDULE_MESSAGE
+            elif masks[key] & bits:
+                error = "Appointment overlaps with existing appointment"
+            elif changed.get(key, 0) & bits:
+                error = "Appointment overlaps with another appointment in the batch"
+            else:
+                changed[key] = changed.get(key, 0) | bits
+                accepted.append(index)
+        results.append({"index": index, "id": None, "error": error})
+
+    if not accepted:
+        return results
+
+    rows = [
+        {
+            "client_id": items[index].client_id,
+            "service_id": items[index].service_id,
+            "master_id": services[items[index].service_id].master_id,
+            "date": items[index].date,
+            "quarter": items[index].quarter,
+            "status": items[index].status,
+            "is_paid": items[index].is_paid,
+        }
+        for index in accepted
+    ]
+    for index, appointment_id in zip(accepted, await _insert_appointments(db, rows)):
+        results[index]["id"] = appointment_id
+
+    await set_master_day_masks(db, {key: masks[key] | bits for key, bits in changed.items()})
+    return results
+
+
+async def _insert_appointments(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """
+    Вставляет записи одним executemany и возвращает их id в порядке rows.
+
+    id ищутся только среди строк, вставленных этим вызовом (id больше максимального
+    до вставки), по ключу (клиент, услуга, дата, квартал): он уникален в пределах
+    пакета, так как кварталы мастеров проверены заранее.
+    """
+    max_id = (await db.execute(select(func.max(Appointment.id)))).scalar() or 0
+    await db.execute(insert(Appointment), rows)
+    positions = {
+        (row["client_id"], row["service_id"], row["date"], row["quarter"]): position
+        for position, row in enumerate(rows)
+    }
     result = await db.execute(
-        select(Appointment).where(Appointment.id == appointment_id)
+        select(Appointment.id, Appointment.client_id, Appointment.service_id, Appointment.date, Appointment.quarter)
+        .where(Appointment.id > max_id)
+        .where(
+            tuple_(Appointment.client_id, Appointment.service_id, Appointment.date, Appointment.quarter)
+            .in_(list(positions))
+        )
     )
-    db_appointment = result.scalar_one_or_none()
-    
-    if not db_appointment:
-        return None
-    
-    for field, value in appointment_update.items():
-        if value is not None:
-            setattr(db_appointment, field, value)
-    
-    await db.commit()
-    await db.refresh(db_appointment)
-    return db_appointment
+    ids = [None] * len(rows)
+    for appointment_id, client_id, service_id, day, quarter in result:
+        ids[positions[(client_id, service_id, day, quarter)]] = appointment_id
+    return ids
+
+
+async def create_combo_appointments(
+    db: AsyncSession,
+    client_id: int,
+    services: List[Service],
+    appointment_date: date,
+    quarter: int
+) -> Tuple[List[int], Optional[str]]:
+    """
+    Создает цепочку записей на услуги services одну за другой, начиная с квартала quarter.
+
+    Строки занятости всех мастеров цепочки блокируются до конца транзакции,
+    цепочка целиком проверяется в памяти и вставляется одним executemany:
+    либо создаются все записи, либо ни одной.
+
+    Returns:
+        (id записей в порядке услуг, None) или ([], сообщение об ошибке)
+    """
+    masks = await lock_master_day_masks(db, ((service.master_id, appointment_date) for service in services))
+    calendars = await get_working_calendars(
+        db, {service.master_id for service in services}, appointment_date, appointment_date
+    )
+
+    changed = {}
+    rows = []
+    start = quarter
+    for service in services:
+        end_quarter = start + service.duration_quarters - 1
+        key = (service.master_id, appointment_date)
+        bits = quarters_mask(start, service.duration_quarters)
+        if end_quarter > QUARTERS_PER_DAY:
+            return [], exceeds_day_message(end_quarter)
+        if bits & ~calendars[service.master_id].working_mask(appointment_date):
+            return [], OUTSIDE_SCHEDULE_MESSAGE
+        if (masks[key] | changed.get(key, 0)) & bits:
+            return [], f"Appointment overlaps with existing appointment. Service {service.id} at quarter {start}"
+        changed[key] = changed.get(key, 0) | bits
+        rows.append({
+            "client_id": client_id,
+            "service_id": service.id,
+            "master_id": service.master_id,
+            "date": appointment_date,
+            "quarter": start,
+            "status": "booked",
+            "is_paid": False,
+        })
+        start = end_quarter + 1
+
+    ids = await _insert_appointments(db, rows)
+    await set_master_day_masks(db, {key: masks[key] | bits for key, bits in changed.items()})
+    return ids, None
+
+
+async def get_appointments_details(db: AsyncSession, appointment_ids: List[int]) -> List[dict]:
+    """Записи по списку ID с данными услуги, клиента и мастера одним запросом (по дате и времени)"""
+    result = await db.execute(
+        _appointment_list_query()
+        .where(Appointment.id.in_(appointment_ids))
+        .order_by(Appointment.date, Appointment.quarter, Appointment.id)
+    )
+    return [dict(row) for row in result.mappings()]
+
+
+async def update_appointment(
+    db: AsyncSession,
+    appointment_id: int,
+    appointment_update: Dict,
+    expected_version: Optional[int] = None
+) -> bool:
+    """
+    Обновляет запись одним UPDATE и увеличивает её версию.
+    Если передан expected_version, UPDATE выполняется только при совпадении версии.
+    Запись не перечитывается — для ответа её читает вызывающий (get_appointment_details).
+
+    Returns:
+        True, если запись обновлена; False, если записи нет или её версия уже другая
+    """
+    values = {field: value for field, value in appointment_update.items() if value is not None}
+    criteria = []
+    if expected_version is not None:
+        criteria.append(Appointment.version == expected_version)
+    if not values:
+        result = await db.execute(
+            select(Appointment.id).where(Appointment.id == appointment_id, *criteria)
+        )
+        return result.scalar_one_or_none() is not None
+    values["version"] = Appointment.version + 1
+    return await update_rows_by_id(db, Appointment, appointment_id, values, *criteria) > 0
 
 
 async def delete_appointment(db: AsyncSession, appointment_id: int) -> bool:
-    """Удаляет запись"""
+    """Удаляет запись и освобождает её кварталы у мастера"""
     result = await db.execute(
-        select(Appointment).where(Appointment.id == appointment_id)
+        select(Appointment.master_id, Appointment.date).where(Appointment.id == appointment_id)
     )
-    db_appointment = result.scalar_one_or_none()
-    
-    if not db_appointment:
+    slot = result.first()
+    if not slot:
         return False
-    
-    await db.delete(db_appointment)
-    await db.commit()
+    if not await delete_by_id(db, Appointment, appointment_id):
+        return False
+    await release_quarters(db, slot.master_id, slot.date)
     return True
 
 
 async def get_appointments_by_client(
     db: AsyncSession, 
-    client_id: int
-) -> List[Appointment]:
-    """Получает все записи клиента"""
-    result = await db.execute(
-        select(Appointment).where(Appointment.client_id == client_id)
+    client_id: int,
+    filters: Optional[AppointmentListFilter] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Получает записи клиента с данными услуги и мастера одним запросом"""
+    return await _get_appointment_list(
+        db, _appointment_list_query().where(Appointment.client_id == client_id), filters
     )
-    return list(result.scalars().all())
 
 
 async def get_appointments_by_master(
     db: AsyncSession,
-    master_id: int
-) -> List[Appointment]:
-    """Получает все записи мастера через услуги"""
+    master_id: int,
+    filters: Optional[AppointmentListFilter] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Получает записи мастера с данными клиента одним запросом"""
+    return await _get_appointment_list(
+        db, _appointment_list_query().where(Appointment.master_id == master_id), filters
+    )
+
+
+async def get_master_calendar(
+    db: AsyncSession,
+    master_id: int,
+    date_from: date,
+    date_to: date
+) -> List[dict]:
+    """
+    Сетка дней x кварталов дня мастера за период: в каждой ячейке запись,
+    занимающая квартал ({"id", "service_title", "status"}), или None.
+    Записи читаются одним запросом по индексу (master_id, date, quarter).
+    """
+    days_count = (date_to - date_from).days + 1
+    grid = [[None] * QUARTERS_PER_DAY for _ in range(days_count)]
+
     result = await db.execute(
-        select(Appointment)
+        select(
+            Appointment.id,
+            Appointment.date,
+            Appointment.quarter,
+            Appointment.status,
+            Service.title,
+            Service.duration_quarters,
+        )
         .join(Service, Appointment.service_id == Service.id)
-        .where(Service.master_id == master_id)
+        .where(Appointment.master_id == master_id)
+        .where(Appointment.date.between(date_from, date_to))
     )
-    return list(result.scalars().all())
+    for appointment_id, day, quarter, appointment_status, title, duration in result:
+        cell = {"id": appointment_id, "service_title": title, "status": appointment_status}
+        quarters = grid[(day - date_from).days]
+        for index in range(quarter - 1, min(quarter - 1 + duration, QUARTERS_PER_DAY)):
+            quarters[index] = cell
+
+    return [
+        {"date": date_from + timedelta(days=offset), "quarters": quarters}
+        for offset, quarters in enumerate(grid)
+    ]
 
 
 async def get_appointments_by_master_and_date(
@@ -113,8 +501,7 @@ async def get_appointments_by_master_and_date(
     """Получает все записи мастера на конкретную дату"""
     result = await db.execute(
         select(Appointment)
-        .join(Service, Appointment.service_id == Service.id)
-        .where(Service.master_id == master_id)
+        .where(Appointment.master_id == master_id)
         .where(Appointment.date == appointment_date)
     )
     return list(result.scalars().all())
@@ -131,8 +518,9 @@ async def validate_appointment(
     Валидирует возможность создания записи.
     
     Проверяет:
-    1. Что запись не выходит за границы 20 кварталов
-    2. Что запись не накладывается на другие записи мастера в этот день
+    1. Что запись не выходит за границы сетки дня
+    2. Что запись попадает в рабочие часы мастера по его календарю
+    3. Что запись не накладывается на другие записи мастера в этот день
     
     Returns:
         (is_valid, error_message)
@@ -144,36 +532,46 @@ async def validate_appointment(
     
     master_id = service.master_id
     
-    # Проверка 1: запись не должна выходить за границы 20 кварталов
+    # Проверка 1: запись не должна выходить за границы сетки дня
     end_quarter = quarter + duration_quarters - 1
-    if end_quarter > 20:
-        return False, f"Appointment exceeds working hours. End quarter {end_quarter} is beyond 20 (17:30)"
-    
-    # Проверка 2: запись не должна накладываться на другие записи мастера
-    existing_appointments = await get_appointments_by_master_and_date(
-        db, master_id, appointment_date
-    )
-    
+    if end_quarter > QUARTERS_PER_DAY:
+        return False, exceeds_day_message(end_quarter)
+
+    # Проверка 2: все кварталы записи — рабочие по календарю мастера
+    bits = quarters_mask(quarter, duration_quarters)
+    if bits & ~await get_working_mask(db, master_id, appointment_date):
+        return False, OUTSIDE_SCHEDULE_MESSAGE
+
+    # Проверка 3: запись не должна накладываться на другие записи мастера —
+    # пересечение с маской занятости дня (из этой сессии, мимо кэша воркера)
+    busy_mask = await get_master_day_mask(db, master_id, appointment_date)
+    if not busy_mask & bits:
+        return True, None
+
+    # Кварталы заняты: для сообщения находим запись, с которой есть пересечение
+    # (existing_start <= new_end AND existing_end >= new_start)
     new_start = quarter
     new_end = quarter + duration_quarters - 1
-    
-    for existing_appointment in existing_appointments:
-        # Получаем услугу для существующей записи, чтобы узнать её длительность
-        existing_service = await get_service_by_id(db, existing_appointment.service_id)
-        if not existing_service:
-            continue
-        
-        existing_start = existing_appointment.quarter
-        existing_end = existing_appointment.quarter + existing_service.duration_quarters - 1
-        
-        # Проверяем наложение интервалов
-        # Интервалы не должны пересекаться: (new_start > existing_end) OR (new_end < existing_start)
-        if not (new_start > existing_end or new_end < existing_start):
-            return False, (
-                f"Appointment overlaps with existing appointment. "
-                f"Master is busy from quarter {existing_start} to {existing_end}"
-            )
-    
+    existing_end = Appointment.quarter + Service.duration_quarters - 1
+
+    result = await db.execute(
+        select(Appointment.quarter, existing_end.label("end_quarter"))
+        .join(Service, Appointment.service_id == Service.id)
+        .where(Appointment.master_id == master_id)
+        .where(Appointment.date == appointment_date)
+        .where(Appointment.quarter <= new_end)
+        .where(existing_end >= new_start)
+        .order_by(Appointment.quarter)
+        .limit(1)
+    )
+    overlapping = result.first()
+    if overlapping:
+        return False, (
+            f"Appointment overlaps with existing appointment. "
+            f"Master is busy from quarter {overlapping.quarter} to {overlapping.end_quarter}"
+        )
+    # Маска разошлась с записями (например, запись только что удалена): окончательно
+    # свободу кварталов проверит условный UPDATE в reserve_quarters
     return True, None
 
 
@@ -185,62 +583,16 @@ async def get_free_quarters(
     """
     Получает список свободных кварталов для услуги на указанную дату.
     
-    Учитывает все записи мастера на этот день и длительность услуги.
+    Квартал свободен, если с него можно начать запись длительностью услуги
+    в рабочие часы мастера и без пересечения с маской занятости мастера.
     
     Returns:
-        Список свободных кварталов (1-20)
+        Список свободных кварталов
     """
-    # Получаем услугу для получения master_id и duration_quarters
     service = await get_service_by_id(db, service_id)
     if not service:
         return []
-    
-    master_id = service.master_id
-    service_duration = service.duration_quarters
-    
-    # Получаем все записи мастера на эту дату
-    existing_appointments = await get_appointments_by_master_and_date(
-        db, master_id, appointment_date
-    )
-    
-    # Создаем множество занятых кварталов
-    busy_quarters = set()
-    
-    for appointment in existing_appointments:
-        # Получаем услугу для существующей записи, чтобы узнать её длительность
-        existing_service = await get_service_by_id(db, appointment.service_id)
-        if not existing_service:
-            continue
-        
-        # Определяем занятые кварталы для этой записи
-        start_quarter = appointment.quarter
-        end_quarter = appointment.quarter + existing_service.duration_quarters - 1
-        
-        # Добавляем все кварталы от start до end включительно
-        for q in range(start_quarter, end_quarter + 1):
-            if 1 <= q <= 20:
-                busy_quarters.add(q)
-    
-    # Определяем свободные кварталы
-    # Квартал считается свободным, если с него можно начать запись длительностью service_duration
-    # без выхода за границы и без наложения на занятые кварталы
-    free_quarters = []
-    
-    for start_quarter in range(1, 21):
-        # Проверяем, что запись не выходит за границы
-        end_quarter = start_quarter + service_duration - 1
-        if end_quarter > 20:
-            continue
-        
-        # Проверяем, что все кварталы в этом интервале свободны
-        is_free = True
-        for q in range(start_quarter, end_quarter + 1):
-            if q in busy_quarters:
-                is_free = False
-                break
-        
-        if is_free:
-            free_quarters.append(start_quarter)
-    
-    return free_quarters
 
+    busy_mask = await get_cached_master_day_mask(db, service.master_id, appointment_date)
+    working_mask = await get_working_mask(db, service.master_id, appointment_date)
+    return free_start_quarters(blocked_mask(busy_mask, working_mask), service.duration_quarters)
@@ -0,0 +1,183 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud.loader import get_loader
+from src.crud.occupancy import free_start_mask, get_master_day_masks, mask_to_quarters
+from src.crud.schedule import blocked_mask, get_working_calendars
+from src.models.service import Service
+from src.models.user import User
+from src.workday import FULL_DAY_MASK, QUARTERS_PER_DAY
+
+
+def date_range(date_from: date, date_to: date) -> List[date]:
+    """Даты от date_from до date_to включительно"""
+    return [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+
+
+async def get_services_availability(
+    db: AsyncSession,
+    services: List[Service],
+    date_from: date,
+    date_to: date
+) -> List[dict]:
+    """
+    Свободные стартовые кварталы каждой услуги на каждую дату периода.
+
+    Занятость всех мастеров за период читается одним запросом, рабочие календари
+    берутся из кэша, дальше для каждой пары (услуга, дата) считается только битовая маска.
+    """
+    master_ids = {service.master_id for service in services}
+    masks = await get_master_day_masks(db, master_ids, date_from, date_to)
+    calendars = await get_working_calendars(db, master_ids, date_from, date_to)
+    days = date_range(date_from, date_to)
+    return [
+        {
+            "service_id": service.id,
+            "title": service.title,
+            "master_id": service.master_id,
+            "duration_quarters": service.duration_quarters,
+            "days": [
+                {
+                    "date": day,
+                    "free_quarters": mask_to_quarters(
+                        free_start_mask(
+                            blocked_mask(
+                                masks.get((service.master_id, day), 0),
+                                calendars[service.master_id].working_mask(day),
+                            ),
+                            service.duration_quarters,
+                        )
+                    ),
+                }
+                for day in days
+            ],
+        }
+        for service in services
+    ]
+
+
+async def find_earliest_slots(
+    db: AsyncSession,
+    role: str,
+    title: Optional[str],
+    date_from: date,
+    date_to: date,
+    limit: int
+) -> List[dict]:
+    """
+    Ближайшие свободные слоты (мастер, услуга, дата, квартал) среди всех мастеров роли.
+
+    Услуги мастеров читаются одним запросом, занятость за весь период — еще одним,
+    рабочие календари — из кэша.
+    Дни перебираются по порядку, и перебор останавливается, как только набрано limit слотов.
+    """
+    query = (
+        select(Service, User.full_name.label("master_full_name"))
+        .join(User, Service.master_id == User.id)
+        .where(User.role == role)
+        .order_by(Service.master_id, Service.id)
+    )
+    if title is not None:
+        query = query.where(Service.title == title)
+    candidates = (await db.execute(query)).all()
+    if not candidates:
+        return []
+
+    master_ids = {service.master_id for service, _ in candidates}
+    masks = await get_master_day_masks(db, master_ids, date_from, date_to)
+    calendars = await get_working_calendars(db, master_ids, date_from, date_to)
+
+    slots = []
+    for day in date_range(date_from, date_to):
+        day_slots = []
+        for service, master_full_name in candidates:
+            busy = blocked_mask(
+                masks.get((service.master_id, day), 0),
+                calendars[service.master_id].working_mask(day),
+            )
+            free = free_start_mask(busy, service.duration_quarters)
+            for quarter in mask_to_quarters(free):
+                day_slots.append({
+                    "date": day,
+                    "quarter": quarter,
+                    "master_id": service.master_id,
+                    "master_full_name": master_full_name,
+                    "service_id": service.id,
+                    "service_title": service.title,
+                    "service_price": service.price,
+                    "duration_quarters": service.duration_quarters,
+                })
+        # Внутри дня — по времени начала, затем по мастеру и услуге (порядок candidates)
+        day_slots.sort(key=lambda slot: slot["quarter"])
+        slots.extend(day_slots[:limit - len(slots)])
+        if len(slots) >= limit:
+            break
+    return slots
+
+
+async def find_combo_chains(
+    db: AsyncSession,
+    services: List[Service],
+    date_from: date,
+    date_to: date,
+    limit: int
+) -> List[dict]:
+    """
+    Цепочки записей на услуги services в заданном порядке, одна за другой без перерывов
+    (услуги могут быть у разных мастеров).
+
+    Услуга i начинается через offset_i = сумма длительностей предыдущих услуг
+    после начала цепочки, поэтому маска допустимых начал цепочки на день —
+    AND по услугам масок свободных стартов, сдвинутых на offset_i:
+    starts = free_0 & free_1 >> offset_1 & ... — по одной битовой операции на услугу.
+    Занятость читается одним запросом за весь период, календари и мастера — из кэшей.
+    """
+    offsets = []
+    total = 0
+    for service in services:
+        offsets.append(total)
+        total += service.duration_quarters
+    if total > QUARTERS_PER_DAY:
+        return []
+
+    master_ids = {service.master_id for service in services}
+    masks = await get_master_day_masks(db, master_ids, date_from, date_to)
+    calendars = await get_working_calendars(db, master_ids, date_from, date_to)
+    masters = await get_loader(db, User).load_many(master_ids)
+
+    chains = []
+    for day in date_range(date_from, date_to):
+        starts = FULL_DAY_MASK
+        for service, offset in zip(services, offsets):
+            busy = blocked_mask(
+                masks.get((service.master_id, day), 0),
+                calendars[service.master_id].working_mask(day),
+            )
+            starts &= free_start_mask(busy, service.duration_quarters) >> offset
+            if not starts:
+                break
+        for quarter in mask_to_quarters(starts):
+            chains.append({
+                "date": day,
+                "start_quarter": quarter,
+                "end_quarter": quarter + total - 1,
+                "total_price": sum(service.price for service in services),
+                "items": [
+                    {
+                        "quarter": quarter + offset,
+                        "master_id": service.master_id,
+                        "master_full_name": masters[service.master_id].full_name,
+                        "service_id": service.id,
+                        "service_title": service.title,
+                        "service_price": service.price,
+                        "duration_quarters": service.duration_quarters,
+                    }
+                    for service, offset in zip(services, offsets)
+                ],
+            })
+            if len(chains) >= limit:
+                return chains
+    return chains
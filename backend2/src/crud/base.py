@@ -0,0 +1,65 @@
+from typing import Any, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.util import identity_key
+
+
+async def update_by_id(db: AsyncSession, model, obj_id: int, values: dict[str, Any], *criteria) -> Optional[Any]:
+    """
+    Обновляет запись одним UPDATE ... WHERE id = :id [AND criteria].
+
+    Если БД поддерживает RETURNING, обновленная строка возвращается тем же запросом.
+    Иначе (MySQL) объект берется из identity map сессии — SQLAlchemy обновляет его
+    значения без запроса, — и только если его там нет, выполняется один SELECT.
+
+    Returns:
+        Обновленный объект или None, если записи с таким id нет (или она не подходит под criteria)
+    """
+    if not values:
+        return await db.get(model, obj_id)
+
+    statement = update(model).where(model.id == obj_id, *criteria).values(**values)
+    if db.bind.dialect.update_returning:
+        result = await db.execute(
+            statement.returning(model),
+            execution_options={"synchronize_session": "fetch"},
+        )
+        return result.scalar_one_or_none()
+
+    result = await db.execute(statement, execution_options={"synchronize_session": "evaluate"})
+    if result.rowcount == 0:
+        return None
+    obj = db.sync_session.identity_map.get(identity_key(model, obj_id))
+    if obj is not None:
+        return obj
+    return await db.get(model, obj_id)
+
+
+async def update_rows_by_id(db: AsyncSession, model, obj_id: int, values: dict[str, Any], *criteria) -> int:
+    """
+    Обновляет запись одним UPDATE ... WHERE id = :id [AND criteria] без перечитывания строки —
+    для вызывающих, которые сами читают запись для ответа.
+
+    Returns:
+        Количество обновленных строк (0 — записи нет или она не подходит под criteria)
+    """
+    result = await db.execute(
+        update(model).where(model.id == obj_id, *criteria).values(**values),
+        execution_options={"synchronize_session": "evaluate"},
+    )
+    return result.rowcount
+
+
+async def delete_by_id(db: AsyncSession, model, obj_id: int) -> bool:
+    """
+    Удаляет запись одним DELETE ... WHERE id = :id.
+
+    Returns:
+        True, если запись была удалена
+    """
+    result = await db.execute(
+        delete(model).where(model.id == obj_id),
+        execution_options={"synchronize_session": "evaluate"},
+    )
+    return result.rowcount > 0
@@ -0,0 +1,98 @@
+import asyncio
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class BatchLoader:
+    """
+    Загрузчик записей по id в рамках одной сессии (одного HTTP запроса).
+
+    id, запрошенные в одном такте event loop (например, через asyncio.gather),
+    загружаются одним запросом WHERE id IN (...). Загруженные записи
+    (и отсутствующие id) запоминаются до конца сессии.
+    """
+
+    def __init__(self, db: AsyncSession, model):
+        self.db = db
+        self.model = model
+        self._cache: dict[int, Any] = {}
+        self._pending: dict[int, asyncio.Future] = {}
+        self._scheduled = False
+        # Запущенные задачи загрузки (держим ссылки, чтобы их не собрал GC)
+        self._tasks: set[asyncio.Task] = set()
+
+    def prime(self, obj) -> None:
+        """Кладет уже загруженную запись в кэш"""
+        self._cache[obj.id] = obj
+
+    def forget(self, obj_id: int) -> None:
+        """Убирает запись из кэша (после удаления)"""
+        self._cache.pop(obj_id, None)
+
+    async def load(self, obj_id: int) -> Optional[Any]:
+        if obj_id in self._cache:
+            return self._cache[obj_id]
+        future = self._pending.get(obj_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[obj_id] = future
+            self._schedule()
+        return await future
+
+    async def load_many(self, obj_ids: Iterable[int]) -> dict[int, Any]:
+        """Загружает несколько записей; возвращает словарь id -> запись (без отсутствующих)"""
+        unique_ids = list(dict.fromkeys(obj_ids))
+        objects = await asyncio.gather(*(self.load(obj_id) for obj_id in unique_ids))
+        return {obj_id: obj for obj_id, obj in zip(unique_ids, objects) if obj is not None}
+
+    def _schedule(self) -> None:
+        if not self._scheduled:
+            self._scheduled = True
+            # Запрос уходит на следующем такте, когда все load() этого такта уже собраны
+            asyncio.get_running_loop().call_soon(self._start_dispatch)
+
+    def _start_dispatch(self) -> None:
+        task = asyncio.ensure_future(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self) -> None:
+        self._scheduled = False
+        pending, self._pending = self._pending, {}
+        try:
+            # Сессия не допускает параллельных запросов — загрузчики разных моделей
+            # одной сессии выполняют свои запросы по очереди
+            async with _session_lock(self.db):
+                result = await self.db.execute(
+                    select(self.model).where(self.model.id.in_(list(pending)))
+                )
+                found = {obj.id: obj for obj in result.scalars().all()}
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for obj_id, future in pending.items():
+            obj = found.get(obj_id)
+            self._cache[obj_id] = obj
+            if not future.done():
+                future.set_result(obj)
+
+
+def _session_lock(db: AsyncSession) -> asyncio.Lock:
+    lock = db.info.get("loader_lock")
+    if lock is None:
+        lock = db.info["loader_lock"] = asyncio.Lock()
+    return lock
+
+
+def get_loader(db: AsyncSession, model) -> BatchLoader:
+    """Возвращает загрузчик модели, привязанный к сессии"""
+    loaders = db.info.setdefault("loaders", {})
+    loader = loaders.get(model)
+    if loader is None:
+        loader = loaders[model] = BatchLoader(db, model)
+    return loader
@@ -0,0 +1,239 @@
+from datetime import date
+from typing import Iterable, List
+
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import LRUCache
+from src.config import settings
+from src.database import savepoint
+from src.models.appointment import Appointment
+from src.models.occupancy import MasterDayOccupancy
+from src.models.service import Service
+from src.workday import QUARTERS_PER_DAY, quarters_mask
+
+# Маски занятости (master_id, date) -> mask для get_free_quarters.
+# Заполняется только из сессий основной БД; проверка при бронировании кэш не использует.
+occupancy_cache = LRUCache(settings.OCCUPANCY_CACHE_SIZE, settings.OCCUPANCY_CACHE_TTL_SECONDS)
+
+
+def free_start_mask(busy_mask: int, duration_quarters: int) -> int:
+    """
+    Маска кварталов, с которых можно начать запись длительностью duration_quarters.
+    Старт q занят, если занят любой из кварталов q .. q + duration - 1, то есть
+    blocked = busy | busy >> 1 | ... | busy >> (duration - 1).
+    """
+    if duration_quarters > QUARTERS_PER_DAY:
+        return 0
+    blocked = busy_mask
+    for shift in range(1, duration_quarters):
+        blocked |= busy_mask >> shift
+    # Запись не должна выходить за конец дня
+    starts = (1 << (QUARTERS_PER_DAY - duration_quarters + 1)) - 1
+    return starts & ~blocked
+
+
+def mask_to_quarters(mask: int) -> List[int]:
+    """Номера кварталов сетки дня, биты которых установлены в маске"""
+    return [quarter for quarter in range(1, QUARTERS_PER_DAY + 1) if mask >> (quarter - 1) & 1]
+
+
+def free_start_quarters(busy_mask: int, duration_quarters: int) -> List[int]:
+    """Кварталы, с которых можно начать запись длительностью duration_quarters"""
+    return mask_to_quarters(free_start_mask(busy_mask, duration_quarters))
+
+
+async def get_master_day_mask(db: AsyncSession, master_id: int, day: date) -> int:
+    """Маска занятых кварталов мастера на дату (0, если записей нет)"""
+    result = await db.execute(
+        select(MasterDayOccupancy.mask)
+        .where(MasterDayOccupancy.master_id == master_id)
+        .where(MasterDayOccupancy.date == day)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def get_cached_master_day_mask(db: AsyncSession, master_id: int, day: date) -> int:
+    """
+    get_master_day_mask через кэш занятости воркера.
+    Сессии реплики (get_read_db) читают маску напрямую: отстающая реплика не должна
+    попадать в кэш, которым пользуются запросы к основной БД.
+    """
+    if db.info.get("replica"):
+        return await get_master_day_mask(db, master_id, day)
+    return await occupancy_cache.get_or_load(
+        (master_id, day), lambda: get_master_day_mask(db, master_id, day)
+    )
+
+
+def _invalidate(db: AsyncSession, master_days: Iterable[tuple[int, date]]) -> None:
+    occupancy_cache.invalidate_in_transaction(db, master_days)
+
+
+async def get_master_day_masks(
+    db: AsyncSession,
+    master_ids: Iterable[int],
+    date_from: date,
+    date_to: date
+) -> dict[tuple[int, date], int]:
+    """
+    Маски занятости мастеров за период одним запросом.
+    Дни без записей в словарь не попадают (маска 0).
+    """
+    master_ids = list(set(master_ids))
+    if not master_ids:
+        return {}
+    result = await db.execute(
+        select(MasterDayOccupancy.master_id, MasterDayOccupancy.date, MasterDayOccupancy.mask)
+        .where(MasterDayOccupancy.master_id.in_(master_ids))
+        .where(MasterDayOccupancy.date.between(date_from, date_to))
+    )
+    return {(master_id, day): mask for master_id, day, mask in result}
+
+
+def _insert_ignore(db: AsyncSession, rows: list[dict]):
+    """
+    INSERT строк занятости, который не падает, если строка уже есть.
+    None — у диалекта нет такого INSERT, см. ensure_master_days.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "mysql":
+        statement = mysql.insert(MasterDayOccupancy).values(rows)
+        return statement.on_duplicate_key_update(mask=MasterDayOccupancy.mask)
+    if dialect == "sqlite":
+        return sqlite.insert(MasterDayOccupancy).values(rows).on_conflict_do_nothing()
+    return None
+
+
+async def ensure_master_days(db: AsyncSession, master_days: Iterable[tuple[int, date]]) -> None:
+    """
+    Создает пустые строки занятости для пар (мастер, дата), которых еще нет.
+    INSERT на InnoDB блокирует строки, поэтому они вставляются в том же порядке
+    (master_id, date), в котором их затем блокирует lock_master_day_masks.
+    """
+    rows = [{"master_id": master_id, "date": day, "mask": 0} for master_id, day in sorted(set(master_days))]
+    if not rows:
+        return
+    statement = _insert_ignore(db, rows)
+    if statement is not None:
+        await db.execute(statement)
+        return
+    # Переносимый путь: по строке в SAVEPOINT, уже существующая строка пропускается
+    for row in rows:
+        try:
+            async with savepoint(db):
+                await db.execute(insert(MasterDayOccupancy).values(**row))
+        except IntegrityError:
+            pass
+
+
+async def lock_master_day_masks(
+    db: AsyncSession,
+    master_days: Iterable[tuple[int, date]]
+) -> dict[tuple[int, date], int]:
+    """
+    Создает недостающие строки занятости и читает маски с блокировкой (SELECT ... FOR UPDATE)
+    до конца транзакции. Строки блокируются в порядке (master_id, date), чтобы
+    параллельные пакеты не взаимоблокировались.
+    """
+    master_days = set(master_days)
+    if not master_days:
+        return {}
+    await ensure_master_days(db, master_days)
+    result = await db.execute(
+        select(MasterDayOccupancy.master_id, MasterDayOccupancy.date, MasterDayOccupancy.mask)
+        .where(tuple_(MasterDayOccupancy.master_id, MasterDayOccupancy.date).in_(list(master_days)))
+        .order_by(MasterDayOccupancy.master_id, MasterDayOccupancy.date)
+        .with_for_update()
+    )
+    return {(master_id, day): mask for master_id, day, mask in result}
+
+
+async def set_master_day_masks(db: AsyncSession, masks: dict[tuple[int, date], int]) -> None:
+    """Записывает маски строк, заблокированных lock_master_day_masks, одним executemany"""
+    if not masks:
+        return
+    await db.execute(
+        update(MasterDayOccupancy),
+        [{"master_id": master_id, "date": day, "mask": mask} for (master_id, day), mask in masks.items()],
+    )
+    _invalidate(db, masks)
+
+
+async def _try_reserve(db: AsyncSession, master_id: int, day: date, bits: int) -> bool:
+    result = await db.execute(
+        update(MasterDayOccupancy)
+        .where(MasterDayOccupancy.master_id == master_id)
+        .where(MasterDayOccupancy.date == day)
+        .where(MasterDayOccupancy.mask.op("&")(bits) == 0)
+        .values(mask=MasterDayOccupancy.mask.op("|")(bits)),
+        execution_options={"synchronize_session": False},
+    )
+    return result.rowcount > 0
+
+
+async def reserve_quarters(
+    db: AsyncSession,
+    master_id: int,
+    day: date,
+    quarter: int,
+    duration_quarters: int
+) -> bool:
+    """
+    Атомарно занимает кварталы мастера на дату.
+
+    Условный UPDATE ... SET mask = mask | bits WHERE mask & bits = 0 берет блокировку строки,
+    поэтому из двух параллельных бронирований одного слота проходит только одно:
+    второе дожидается COMMIT первого и уже не находит свободных битов.
+    Строка дня создается только при первой записи мастера на эту дату.
+
+    Returns:
+        True, если кварталы были свободны и заняты этим вызовом
+    """
+    bits = quarters_mask(quarter, duration_quarters)
+    reserved = await _try_reserve(db, master_id, day, bits)
+    if not reserved:
+        await ensure_master_days(db, [(master_id, day)])
+        reserved = await _try_reserve(db, master_id, day, bits)
+    if reserved:
+        _invalidate(db, [(master_id, day)])
+    return reserved
+
+
+async def release_quarters(db: AsyncSession, master_id: int, day: date) -> None:
+    """
+    Освобождает кварталы мастера на дату после удаления записи.
+    Маска дня пересчитывается по оставшимся записям: у старых записей,
+    перенесенных миграцией, кварталы могут пересекаться, и просто снять биты
+    удаленной записи нельзя.
+    """
+    await rebuild_master_days(db, [(master_id, day)])
+
+
+async def rebuild_master_days(db: AsyncSession, master_days: Iterable[tuple[int, date]]) -> None:
+    """
+    Пересчитывает маски занятости по записям для пар (мастер, дата).
+    Нужен, когда меняется длительность или мастер услуги, либо записи удаляются.
+
+    Строки занятости сначала блокируются (lock_master_day_masks): параллельное бронирование
+    ждет COMMIT пересчета, а уже закоммиченное — видно блокирующему чтению записей
+    (FOR SHARE читает последние версии строк, а не снимок транзакции).
+    """
+    master_days = set(master_days)
+    if not master_days:
+        return
+    await lock_master_day_masks(db, master_days)
+
+    result = await db.execute(
+        select(Appointment.master_id, Appointment.date, Appointment.quarter, Service.duration_quarters)
+        .join(Service, Appointment.service_id == Service.id)
+        .where(tuple_(Appointment.master_id, Appointment.date).in_(list(master_days)))
+        .with_for_update(read=True)
+    )
+    masks = dict.fromkeys(master_days, 0)
+    for master_id, day, quarter, duration in result:
+        masks[(master_id, day)] |= quarters_mask(quarter, duration)
+
+    await set_master_day_masks(db, masks)
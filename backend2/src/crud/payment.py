@@ -1,23 +1,17 @@
+from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from typing import List, Optional
 
 from src.models.payment import Payment
 from src.models.appointment import Appointment
 from src.models.service import Service
+from src.models.user import User
 from src.schemas.payment import PaymentCreate
 from src.crud.service import get_service_by_id
 from src.crud.user import get_user_by_id
-
-
-def quarter_to_time(quarter: int) -> str:
-    """Преобразует квартал в время в формате HH:MM"""
-    # Quarter 1 = 8:00, quarter 2 = 8:30, и т.д.
-    hours = 8
-    minutes = (quarter - 1) * 30
-    hours += minutes // 60
-    minutes = minutes % 60
-    return f"{hours:02d}:{minutes:02d}"
+from src.crud.loader import get_loader
+from src.workday import quarter_to_time
 
 
 async def get_payments_by_master(
@@ -30,11 +24,9 @@ async def get_payments_by_master(
     Returns:
         Список словарей с данными оплат
     """
-    # Получаем все записи мастера через услуги
+    # Получаем все записи мастера
     result = await db.execute(
-        select(Appointment)
-        .join(Service, Appointment.service_id == Service.id)
-        .where(Service.master_id == master_id)
+        select(Appointment).where(Appointment.master_id == master_id)
     )
     appointments = list(result.scalars().all())
     
@@ -48,6 +40,10 @@ async def get_payments_by_master(
     )
     payments = list(payments_result.scalars().all())
     
+    # Загружаем услуги и клиентов пачками, а не по запросу на оплату
+    await get_loader(db, Service).load_many(app.service_id for app in appointments)
+    await get_loader(db, User).load_many(app.client_id for app in appointments)
+
     # Формируем ответ с полной информацией
     result_list = []
     for payment in payments:
@@ -90,7 +86,35 @@ async def create_payment(
         amount=payment_create.amount
     )
     db.add(db_payment)
-    await db.flush()  # Используем flush вместо commit, так как get_db сам делает commit
+    await db.flush()  # COMMIT выполняет get_db в конце запроса
     await db.refresh(db_payment)
     return db_payment
 
+
+async def settle_appointment(
+    db: AsyncSession,
+    appointment: Appointment,
+    amount: Optional[Decimal] = None
+) -> Optional[Payment]:
+    """
+    Отмечает запись оплаченной и создает оплату в одной транзакции.
+    Сумма по умолчанию — цена услуги.
+
+    Returns:
+        Созданная оплата или None, если запись уже оплачена
+        (в том числе параллельным запросом)
+    """
+    result = await db.execute(
+        update(Appointment)
+        .where(Appointment.id == appointment.id)
+        .where(Appointment.is_paid.is_(False))
+        .values(is_paid=True, version=Appointment.version + 1),
+        execution_options={"synchronize_session": "evaluate"},
+    )
+    if result.rowcount == 0:
+        return None
+
+    if amount is None:
+        service = await get_service_by_id(db, appointment.service_id)
+        amount = service.price
+    return await create_payment(db, PaymentCreate(appointment_id=appointment.id, amount=amount))
@@ -0,0 +1,196 @@
+from datetime import date
+from typing import Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import LRUCache
+from src.config import settings
+from src.models.schedule import MasterScheduleException, MasterWeeklySchedule
+from src.workday import FULL_DAY_MASK, QUARTERS_PER_DAY, quarters_mask
+
+
+class WorkingCalendar(NamedTuple):
+    """Скомпилированный календарь мастера: маски рабочих кварталов по дням недели и исключения"""
+    weekly: tuple[int, ...]
+    exceptions: dict[date, int]
+
+    def working_mask(self, day: date) -> int:
+        return self.exceptions.get(day, self.weekly[day.weekday()])
+
+
+# Календарь мастера без настроек: полный день сетки каждый день
+DEFAULT_CALENDAR = WorkingCalendar((FULL_DAY_MASK,) * 7, {})
+
+# Календари мастеров master_id -> WorkingCalendar (исключения с дня загрузки).
+# Меняются редко, поэтому рабочие часы не стоят отдельного запроса на каждый
+# расчет свободного времени; бронирование кэш не использует (см. get_working_calendars).
+schedule_cache = LRUCache(settings.SCHEDULE_CACHE_SIZE, settings.SCHEDULE_CACHE_TTL_SECONDS)
+
+
+def intervals_to_mask(intervals: Iterable[tuple[int, int]]) -> int:
+    """Маска рабочих кварталов по интервалам (start_quarter, end_quarter) включительно"""
+    mask = 0
+    for start_quarter, end_quarter in intervals:
+        mask |= quarters_mask(start_quarter, end_quarter - start_quarter + 1)
+    return mask
+
+
+def mask_to_intervals(mask: int) -> List[tuple[int, int]]:
+    """Интервалы (start_quarter, end_quarter) подряд идущих установленных битов маски"""
+    intervals = []
+    start = None
+    for quarter in range(1, QUARTERS_PER_DAY + 2):
+        working = quarter <= QUARTERS_PER_DAY and mask >> (quarter - 1) & 1
+        if working and start is None:
+            start = quarter
+        elif not working and start is not None:
+            intervals.append((start, quarter - 1))
+            start = None
+    return intervals
+
+
+def blocked_mask(busy_mask: int, working_mask: int) -> int:
+    """Кварталы, недоступные для записи: занятые записями и нерабочие"""
+    return busy_mask | (FULL_DAY_MASK & ~working_mask)
+
+
+async def _load_calendars(
+    db: AsyncSession,
+    master_ids: list[int],
+    date_from: date,
+    date_to: Optional[date] = None
+) -> dict[int, WorkingCalendar]:
+    """
+    Календари мастеров двумя запросами (шаблоны и исключения).
+    Исключения читаются только с date_from (и до date_to, если задана):
+    календарь отвечает только за даты этого окна.
+    """
+    weekly = {master_id: [FULL_DAY_MASK] * 7 for master_id in master_ids}
+    exceptions = {master_id: {} for master_id in master_ids}
+
+    result = await db.execute(
+        select(MasterWeeklySchedule.master_id, MasterWeeklySchedule.weekday, MasterWeeklySchedule.working_mask)
+        .where(MasterWeeklySchedule.master_id.in_(master_ids))
+    )
+    for master_id, weekday, working_mask in result:
+        weekly[master_id][weekday] = working_mask
+
+    query = (
+        select(MasterScheduleException.master_id, MasterScheduleException.date, MasterScheduleException.working_mask)
+        .where(MasterScheduleException.master_id.in_(master_ids))
+        .where(MasterScheduleException.date >= date_from)
+    )
+    if date_to is not None:
+        query = query.where(MasterScheduleException.date <= date_to)
+    result = await db.execute(query)
+    for master_id, day, working_mask in result:
+        exceptions[master_id][day] = working_mask
+
+    return {
+        master_id: WorkingCalendar(tuple(weekly[master_id]), exceptions[master_id])
+        for master_id in master_ids
+    }
+
+
+async def get_working_calendars(
+    db: AsyncSession,
+    master_ids: Iterable[int],
+    date_from: date,
+    date_to: date
+) -> dict[int, WorkingCalendar]:
+    """
+    Календари мастеров для дат date_from..date_to.
+
+    Кэш воркера используют только сессии чтения основной БД (get_read_db) для дат
+    с сегодняшнего дня; в кэше календари хранят исключения с дня загрузки.
+    Сессии get_db (бронирование) читают календарь из своей транзакции: изменение
+    рабочих часов через другой воркер должно действовать сразу, а не после TTL кэша.
+    Сессии реплики кэш не заполняют (см. get_cached_master_day_mask).
+    """
+    master_ids = list(set(master_ids))
+    today = date.today()
+    if not db.info.get("read_only") or db.info.get("replica") or date_from < today:
+        return await _load_calendars(db, master_ids, date_from, date_to)
+    return await schedule_cache.get_many_or_load(
+        master_ids, lambda missing: _load_calendars(db, missing, today)
+    )
+
+
+async def get_working_mask(db: AsyncSession, master_id: int, day: date) -> int:
+    """Маска рабочих кварталов мастера на дату"""
+    calendars = await get_working_calendars(db, [master_id], day, day)
+    return calendars[master_id].working_mask(day)
+
+
+async def get_weekly_schedule(db: AsyncSession, master_id: int) -> list[MasterWeeklySchedule]:
+    """Недельный шаблон мастера (только настроенные дни недели)"""
+    result = await db.execute(
+        select(MasterWeeklySchedule)
+        .where(MasterWeeklySchedule.master_id == master_id)
+        .order_by(MasterWeeklySchedule.weekday)
+    )
+    return list(result.scalars().all())
+
+
+async def replace_weekly_schedule(db: AsyncSession, master_id: int, masks: dict[int, int]) -> None:
+    """Заменяет недельный шаблон мастера: weekday -> маска рабочих кварталов"""
+    await db.execute(
+        delete(MasterWeeklySchedule).where(MasterWeeklySchedule.master_id == master_id),
+        execution_options={"synchronize_session": False},
+    )
+    if masks:
+        await db.execute(
+            insert(MasterWeeklySchedule),
+            [
+                {"master_id": master_id, "weekday": weekday, "working_mask": mask}
+                for weekday, mask in sorted(masks.items())
+            ],
+        )
+    schedule_cache.invalidate_in_transaction(db, [master_id])
+
+
+async def get_schedule_exceptions(
+    db: AsyncSession,
+    master_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> list[MasterScheduleException]:
+    """Исключения календаря мастера, по дате"""
+    query = (
+        select(MasterScheduleException)
+        .where(MasterScheduleException.master_id == master_id)
+        .order_by(MasterScheduleException.date)
+    )
+    if date_from is not None:
+        query = query.where(MasterScheduleException.date >= date_from)
+    if date_to is not None:
+        query = query.where(MasterScheduleException.date <= date_to)
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
+async def set_schedule_exception(db: AsyncSession, master_id: int, day: date, mask: int) -> None:
+    """Задает рабочие кварталы мастера на дату (маска 0 — выходной)"""
+    await delete_schedule_exception(db, master_id, day)
+    await db.execute(
+        insert(MasterScheduleException),
+        [{"master_id": master_id, "date": day, "working_mask": mask}],
+    )
+
+
+async def delete_schedule_exception(db: AsyncSession, master_id: int, day: date) -> bool:
+    """
+    Удаляет исключение календаря: на дату снова действует недельный шаблон.
+
+    Returns:
+        True, если исключение было
+    """
+    result = await db.execute(
+        delete(MasterScheduleException)
+        .where(MasterScheduleException.master_id == master_id)
+        .where(MasterScheduleException.date == day),
+        execution_options={"synchronize_session": False},
+    )
+    schedule_cache.invalidate_in_transaction(db, [master_id])
+    return result.rowcount > 0
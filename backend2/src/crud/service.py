@@ -1,7 +1,12 @@
+from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from typing import Optional
 
+from src.crud.base import delete_by_id, update_by_id
+from src.crud.loader import get_loader
+from src.crud.occupancy import rebuild_master_days
+from src.models.appointment import Appointment
 from src.models.service import Service
 from src.schemas.service import ServiceCreate, ServiceUpdate
 
@@ -23,11 +28,13 @@ async def get_services_by_master_id(db: AsyncSession, master_id: int) -> list[Se
 
 
 async def get_service_by_id(db: AsyncSession, service_id: int) -> Optional[Service]:
-    """Получает услугу по ID"""
-    result = await db.execute(
-        select(Service).where(Service.id == service_id)
-    )
-    return result.scalar_one_or_none()
+    """Получает услугу по ID (батчится и кэшируется в рамках сессии)"""
+    return await get_loader(db, Service).load(service_id)
+
+
+async def get_services_by_ids(db: AsyncSession, service_ids: list[int]) -> dict[int, Service]:
+    """Получает услуги по списку ID одним запросом; возвращает словарь id -> услуга"""
+    return await get_loader(db, Service).load_many(service_ids)
 
 
 async def create_service(db: AsyncSession, service_create: ServiceCreate) -> Service:
@@ -39,8 +46,9 @@ async def create_service(db: AsyncSession, service_create: ServiceCreate) -> Ser
         master_id=service_create.master_id
     )
     db.add(db_service)
-    await db.commit()
+    await db.flush()  # COMMIT выполняет get_db в конце запроса
     await db.refresh(db_service)
+    get_loader(db, Service).prime(db_service)
     return db_service
 
 
@@ -49,35 +57,64 @@ async def update_service(
     service_id: int, 
     service_update: ServiceUpdate
 ) -> Optional[Service]:
-    """Обновляет услугу (частичное обновление)"""
-    result = await db.execute(
-        select(Service).where(Service.id == service_id)
-    )
-    db_service = result.scalar_one_or_none()
-    
-    if not db_service:
-        return None
-    
+    """
+    Обновляет услугу (частичное обновление) одним UPDATE.
+    Если меняется мастер, переносит на него записи услуги.
+    Если меняются длительность или мастер, пересчитывает занятость дней с записями на услугу
+    (с сегодняшнего дня, см. _get_appointment_dates).
+    """
     update_data = service_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_service, field, value)
-    
-    await db.commit()
-    await db.refresh(db_service)
-    return db_service
+    if not update_data.keys() & {"duration_quarters", "master_id"}:
+        return await update_by_id(db, Service, service_id, update_data)
+
+    old_master_id = await _get_master_id(db, service_id)
+    dates = await _get_appointment_dates(db, service_id)
+    service = await update_by_id(db, Service, service_id, update_data)
+    if service and service.master_id != old_master_id:
+        await db.execute(
+            update(Appointment)
+            .where(Appointment.service_id == service_id)
+            .values(master_id=service.master_id, version=Appointment.version + 1),
+            execution_options={"synchronize_session": "evaluate"},
+        )
+    if service:
+        await rebuild_master_days(
+            db, [(master_id, day) for master_id in {old_master_id, service.master_id} for day in dates]
+        )
+    return service
 
 
 async def delete_service(db: AsyncSession, service_id: int) -> bool:
-    """Удаляет услугу"""
+    """
+    Удаляет услугу одним DELETE (записи удаляются каскадом) и пересчитывает занятость
+    мастера с сегодняшнего дня (см. _get_appointment_dates)
+    """
+    master_id = await _get_master_id(db, service_id)
+    dates = await _get_appointment_dates(db, service_id)
+    deleted = await delete_by_id(db, Service, service_id)
+    get_loader(db, Service).forget(service_id)
+    if deleted:
+        await rebuild_master_days(db, [(master_id, day) for day in dates])
+    return deleted
+
+
+async def _get_master_id(db: AsyncSession, service_id: int) -> Optional[int]:
+    result = await db.execute(select(Service.master_id).where(Service.id == service_id))
+    return result.scalar_one_or_none()
+
+
+async def _get_appointment_dates(db: AsyncSession, service_id: int) -> list:
+    """
+    Даты записей на услугу, начиная с сегодняшнего дня.
+    Маски занятости нужны только для бронирования и свободного времени, поэтому прошедшие
+    дни не пересчитываются: иначе изменение давно существующей услуги блокировало бы
+    строки занятости за всю её историю.
+    """
     result = await db.execute(
-        select(Service).where(Service.id == service_id)
+        select(Appointment.date)
+        .where(Appointment.service_id == service_id)
+        .where(Appointment.date >= date.today())
+        .distinct()
     )
-    db_service = result.scalar_one_or_none()
-    
-    if not db_service:
-        return False
-    
-    await db.delete(db_service)
-    await db.commit()
-    return True
+    return list(result.scalars().all())
 
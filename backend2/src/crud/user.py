@@ -2,7 +2,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from typing import Optional
 
-from src.models.user import User
+from src.crud.base import update_by_id
+from src.crud.loader import get_loader
+from src.models.user import MASTER_ROLES, User
 from src.schemas.user import UserCreate, UserUpdate
 from src.utils import get_password_hash
 
@@ -14,9 +16,13 @@ async def get_user_by_login(db: AsyncSession, login: str) -> Optional[User]:
 
 
 async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
-    """Получает пользователя по ID"""
-    result = await db.execute(select(User).where(User.id == user_id))
-    return result.scalar_one_or_none()
+    """Получает пользователя по ID (батчится и кэшируется в рамках сессии)"""
+    return await get_loader(db, User).load(user_id)
+
+
+async def get_users_by_ids(db: AsyncSession, user_ids: list[int]) -> dict[int, User]:
+    """Получает пользователей по списку ID одним запросом; возвращает словарь id -> пользователь"""
+    return await get_loader(db, User).load_many(user_ids)
 
 
 async def create_user(db: AsyncSession, user_create: UserCreate) -> User:
@@ -30,13 +36,14 @@ async def create_user(db: AsyncSession, user_create: UserCreate) -> User:
         role=user_create.role
     )
     db.add(db_user)
-    await db.commit()
+    await db.flush()  # COMMIT выполняет get_db в конце запроса
     await db.refresh(db_user)
+    get_loader(db, User).prime(db_user)
     return db_user
 
 
 async def get_all_masters(db: AsyncSession) -> list[dict]:
-    """Получает всех мастеров (пользователей с ролью != CLIENT) с подсчетом количества услуг"""
+    """Получает всех мастеров (пользователей с ролями мастеров) с подсчетом количества услуг"""
     from src.models.service import Service
     
     # Подзапрос для подсчета услуг
@@ -46,7 +53,7 @@ async def get_all_masters(db: AsyncSession) -> list[dict]:
         .scalar_subquery()
     )
     
-    # Основной запрос
+    # Основной запрос: IN по ролям мастеров, а не != 'CLIENT' — так он идет по индексу ix_users_role
     result = await db.execute(
         select(
             User.id,
@@ -54,7 +61,7 @@ async def get_all_masters(db: AsyncSession) -> list[dict]:
             User.role,
             User.phone_number,
             services_count_subquery.label("services_count")
-        ).where(User.role != "CLIENT")
+        ).where(User.role.in_(MASTER_ROLES))
     )
     
     rows = result.all()
@@ -75,19 +82,8 @@ async def update_user(
     user_id: int,
     user_update: UserUpdate
 ) -> Optional[User]:
-    """Обновляет пользователя (частичное обновление)"""
-    result = await db.execute(select(User).where(User.id == user_id))
-    db_user = result.scalar_one_or_none()
-    
-    if not db_user:
-        return None
-    
+    """Обновляет пользователя (частичное обновление) одним UPDATE"""
     update_data = user_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        if value is not None:
-            setattr(db_user, field, value)
-    
-    await db.commit()
-    await db.refresh(db_user)
-    return db_user
+    values = {field: value for field, value in update_data.items() if value is not None}
+    return await update_by_id(db, User, user_id, values)
 
@@ -1,25 +1,81 @@
-from sqlalchemy import text
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from jose import JWTError, jwt
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.config import settings
+from src.pool import instrument_pool, warm_up_pool
+from src.query_stats import instrument_engine
+from src.slow_query_log import instrument_engine as instrument_slow_query_log
 from src.models.base import Base
 from src.models.user import User
 from src.models.service import Service
 from src.models.appointment import Appointment
 from src.models.payment import Payment
+from src.models.occupancy import MasterDayOccupancy
+from src.models.schedule import MasterWeeklySchedule, MasterScheduleException
 
 # Асинхронный URL для подключения к MySQL
 DATABASE_URL = settings.DATABASE_URL
 
-# Создаем асинхронный engine для MySQL
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,  # Логирование SQL запросов (отключите в production)
-    poolclass=NullPool,  # Для избежания проблем с пулом соединений
-    future=True,  # Для поддержки SQLAlchemy 2.0
-)
+
+def _create_engine(url: str, **kwargs):
+    """Создает асинхронный engine с пулом соединений из настроек"""
+    return create_async_engine(
+        url,
+        echo=False,  # Логирование SQL запросов (отключите в production)
+        poolclass=AsyncAdaptedQueuePool,  # Пул соединений (статистика — src/pool.py)
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,  # MySQL закрывает простаивающие соединения (wait_timeout)
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        future=True,  # Для поддержки SQLAlchemy 2.0
+        **kwargs,
+    )
+
+
+# Создаем асинхронный engine для MySQL (основная БД, все записи идут сюда)
+engine = _create_engine(DATABASE_URL)
+
+# Есть ли отдельная реплика для чтения
+HAS_REPLICA = bool(settings.DATABASE_REPLICA_URL)
+
+# Engine реплики для чтения (None, если реплика не задана).
+# Соединения работают в режиме autocommit: каждый SELECT видит последние
+# закоммиченные данные (семантика READ COMMITTED), транзакция не держится
+# открытой и COMMIT не отправляется. Откатывать при возврате в пул нечего.
+read_engine = _create_engine(
+    settings.DATABASE_REPLICA_URL,
+    isolation_level="AUTOCOMMIT",
+    pool_reset_on_return=None,
+) if HAS_REPLICA else None
+
+# Чтения с основной БД в autocommit — через тот же пул, что и записи:
+# без реплики воркер открывает не больше DB_POOL_SIZE + DB_MAX_OVERFLOW соединений
+primary_read_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+# Статистика пулов соединений (src/pool.py)
+instrument_pool(engine)
+
+# Подсчет SQL запросов на HTTP запрос (src/query_stats.py)
+instrument_engine(engine)
+
+# Журнал медленных запросов с EXPLAIN (src/slow_query_log.py)
+instrument_slow_query_log(engine)
+
+if HAS_REPLICA:
+    instrument_pool(read_engine)
+    instrument_engine(read_engine)
+    instrument_slow_query_log(read_engine)
 
 # Создаем асинхронную сессию
 AsyncSessionLocal = sessionmaker(
@@ -29,15 +85,110 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# Сессии только для чтения (реплика, а если она не задана — основная БД, autocommit)
+ReadSessionLocal = sessionmaker(
+    bind=read_engine if HAS_REPLICA else primary_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Сессии только для чтения с основной БД — для read-your-writes при наличии реплики
+PrimaryReadSessionLocal = sessionmaker(
+    bind=primary_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Пользователи, недавно изменявшие данные: login -> момент (time.monotonic()),
+# до которого их чтения идут в основную БД (read-your-writes при отставании реплики).
+# Хранится в памяти воркера; между воркерами и контейнерами признак переносит
+# cookie READ_YOUR_WRITES_COOKIE, которую ставит UnitOfWorkRoute после изменений.
+_recent_writers: dict[str, float] = {}
+
+# Cookie с моментом (unix time), до которого чтения клиента идут в основную БД
+READ_YOUR_WRITES_COOKIE = "read_primary_until"
+
+
+def _request_login(request: Request) -> Optional[str]:
+    """
+    Достает логин пользователя из Bearer токена запроса.
+    Подпись здесь не проверяется — логин нужен только для выбора БД,
+    аутентификация выполняется в get_current_user.
+    """
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+
+
+def mark_recent_write(login: Optional[str]) -> None:
+    """Направляет чтения пользователя в основную БД на REPLICA_READ_YOUR_WRITES_SECONDS"""
+    if not login or not HAS_REPLICA:
+        return
+    now = time.monotonic()
+    if len(_recent_writers) > 10000:
+        for stale_login in [key for key, until in _recent_writers.items() if until <= now]:
+            del _recent_writers[stale_login]
+    _recent_writers[login] = now + settings.REPLICA_READ_YOUR_WRITES_SECONDS
+
+
+def _reads_from_primary(request: Request) -> bool:
+    """Нужно ли читать из основной БД, чтобы пользователь увидел свои изменения"""
+    if not HAS_REPLICA:
+        return False
+    login = _request_login(request)
+    if login is not None and _recent_writers.get(login, 0.0) > time.monotonic():
+        return True
+    try:
+        until = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, ""))
+    except ValueError:
+        return False
+    now = time.time()
+    # Значение из будущего дальше окна не принимаем: cookie не должна навсегда уводить чтения с реплики
+    return now < until <= now + settings.REPLICA_READ_YOUR_WRITES_SECONDS + 1
+
+
+def _set_read_your_writes_cookie(response: Response) -> None:
+    window = settings.REPLICA_READ_YOUR_WRITES_SECONDS
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE,
+        f"{time.time() + window:.3f}",
+        max_age=math.ceil(window),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush_writes(session, flush_context):
+    session.info["has_writes"] = True
+    mark_recent_write(session.info.get("login"))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+        mark_recent_write(orm_execute_state.session.info.get("login"))
+
+
 # Dependency для получения асинхронной сессии
-async def get_db() -> AsyncSession:
+async def get_db(request: Request) -> AsyncSession:
     """
-    Асинхронная dependency для получения сессии БД.
-    Использование:
-        async with get_db() as db:
-            # работа с БД
+    Асинхронная dependency для получения сессии БД (основная БД).
+    Единица работы на запрос: crud функции только делают flush,
+    а COMMIT выполняется один раз в конце запроса (см. UnitOfWorkRoute).
+    При исключении все изменения запроса откатываются.
     """
     async with AsyncSessionLocal() as session:
+        session.info["login"] = _request_login(request)
+        request.state.db_session = session
         try:
             yield session
             await session.commit()
@@ -47,11 +198,77 @@ async def get_db() -> AsyncSession:
         finally:
             await session.close()
 
+
+class UnitOfWorkRoute(APIRoute):
+    """
+    Маршрут, который коммитит сессию get_db сразу после обработчика,
+    до отправки ответа клиенту. Код после yield в dependency выполняется
+    уже после отправки ответа, поэтому без этого клиент мог бы получить
+    успешный ответ раньше, чем данные будут закоммичены (или при ошибке COMMIT).
+    Повторный commit в get_db после этого ничего не делает.
+    Если запрос что-то изменил, в ответ ставится cookie read-your-writes (см. get_read_db).
+    """
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+
+        async def unit_of_work_handler(request: Request) -> Response:
+            response = await route_handler(request)
+            session = getattr(request.state, "db_session", None)
+            if session is not None:
+                await session.commit()
+                if HAS_REPLICA and session.info.get("has_writes"):
+                    _set_read_your_writes_cookie(response)
+            return response
+
+        return unit_of_work_handler
+
+
+@asynccontextmanager
+async def savepoint(db: AsyncSession):
+    """
+    Вложенная транзакция (SAVEPOINT) внутри единицы работы запроса.
+    Если внутри блока возникло исключение, откатываются только изменения блока,
+    исключение пробрасывается дальше — обработчик может его перехватить
+    и продолжить работу с остальными изменениями запроса.
+    Использование:
+        try:
+            async with savepoint(db):
+                ...
+        except IntegrityError:
+            ...
+    """
+    async with db.begin_nested() as nested:
+        yield nested
+
+
+# Dependency для получения сессии на чтение
+async def get_read_db(request: Request) -> AsyncSession:
+    """
+    Асинхронная dependency только для чтения (GET эндпоинты, аутентификация).
+    Читает с реплики (DATABASE_REPLICA_URL), но сразу после изменений,
+    сделанных этим же пользователем, — с основной БД: по отметке в памяти воркера
+    или по cookie READ_YOUR_WRITES_COOKIE, если запрос попал на другой воркер.
+    Работает в autocommit и никогда не выполняет COMMIT — не изменяйте через нее данные.
+    """
+    session_factory = (
+        PrimaryReadSessionLocal
+        if _reads_from_primary(request)
+        else ReadSessionLocal
+    )
+    async with session_factory() as session:
+        # Данные реплики могут отставать: по этому признаку общие кэши воркера
+        # не заполняются из таких сессий
+        session.info["replica"] = HAS_REPLICA and session_factory is ReadSessionLocal
+        # Кэши воркера заполняются только из сессий чтения, а не из транзакций записи
+        session.info["read_only"] = True
+        yield session
+
 # Функция для создания таблиц
 async def create_tables():
     """
-    Создает все таблицы в базе данных.
-    Вызывается при старте приложения.
+    Создает все таблицы в базе данных по текущим моделям.
+    Для рабочих БД используйте миграции (python -m src.migrations upgrade).
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -65,6 +282,27 @@ async def drop_tables():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
+# Функция для прогрева пула соединений
+async def warm_up_db_pool():
+    """
+    Открывает DB_POOL_WARMUP соединений при старте воркера,
+    чтобы первые запросы не платили за подключение к MySQL.
+    """
+    count = min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE)
+    await warm_up_pool(engine, count)
+    if HAS_REPLICA:
+        await warm_up_pool(read_engine, count)
+
+# Функция для закрытия соединений пула
+async def dispose_engine():
+    """
+    Закрывает все соединения пула.
+    Вызывается при остановке приложения.
+    """
+    await engine.dispose()
+    if HAS_REPLICA:
+        await read_engine.dispose()
+
 # Функция для проверки подключения к БД
 async def check_db_connection():
     """
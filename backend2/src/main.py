@@ -3,11 +3,16 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from src.auth import router as auth_router
 from src.config import settings
-from src.database import check_db_connection, create_tables
+from src.database import check_db_connection, dispose_engine, engine, warm_up_db_pool
+from src.migrations import check_schema_version
+from src.query_stats import db_query_stats_middleware
 from src.routers.user import router as user_router
 from src.routers.service import router as service_router
 from src.routers.appointment import router as appointment_router
 from src.routers.payment import router as payment_router
+from src.routers.system import router as system_router
+from src.routers.availability import router as availability_router
+from src.routers.schedule import router as schedule_router
 
 app = FastAPI(
     title="Beauty Salon API",
@@ -23,11 +28,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries", "X-DB-Time-ms", "X-Next-Cursor", "ETag"],
 )
 
+app.middleware("http")(db_query_stats_middleware)
+
 @app.on_event("startup")
 async def startup_event():
-    await create_tables()
+    # Схему меняет только `python -m src.migrations upgrade` (один раз на деплой)
+    await check_schema_version(engine)
+    await warm_up_db_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await dispose_engine()
 
 
 main_router = APIRouter(prefix="/api")
@@ -36,6 +51,9 @@ main_router.include_router(user_router, tags=["Users"])
 main_router.include_router(service_router, tags=["Services"])
 main_router.include_router(appointment_router, tags=["Appointments"])
 main_router.include_router(payment_router, tags=["Payments"])
+main_router.include_router(availability_router, tags=["Availability"])
+main_router.include_router(schedule_router, tags=["Schedules"])
+main_router.include_router(system_router, tags=["System"])
 
 
 app.include_router(main_router)
@@ -0,0 +1,108 @@
+"""
+Версионированные миграции схемы БД.
+
+Ревизии лежат в src/migrations/versions в файлах вида vNNNN_<описание>.py и
+применяются по порядку номеров. Каждый модуль ревизии определяет:
+    revision: int          — номер ревизии (совпадает с NNNN в имени файла)
+    description: str       — краткое описание
+    def upgrade(connection) — синхронная функция, получает sqlalchemy Connection
+
+Применение ожидающих миграций (один раз на деплой):
+    python -m src.migrations upgrade
+"""
+import importlib
+import pkgutil
+from types import ModuleType
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.migrations import versions
+
+# Таблица с примененными ревизиями (одна строка на ревизию)
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+def load_revisions() -> list[ModuleType]:
+    """Загружает модули ревизий, отсортированные по номеру"""
+    revisions = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        if not module_info.name.startswith("v"):
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        revisions.append(module)
+    revisions.sort(key=lambda module: module.revision)
+
+    numbers = [module.revision for module in revisions]
+    if numbers != list(range(1, len(numbers) + 1)):
+        raise RuntimeError(f"Migration revisions must be numbered 1..N without gaps, got {numbers}")
+    return revisions
+
+
+def head_revision() -> int:
+    """Номер последней ревизии в коде"""
+    revisions = load_revisions()
+    return revisions[-1].revision if revisions else 0
+
+
+async def get_current_version(connection: AsyncConnection) -> int:
+    """Текущая версия схемы в БД (0, если миграции еще не применялись)"""
+    try:
+        result = await connection.execute(select(func.max(schema_version.c.version)))
+    except DBAPIError:
+        # Таблицы schema_version еще нет
+        await connection.rollback()
+        return 0
+    return result.scalar() or 0
+
+
+async def upgrade(engine: AsyncEngine) -> list[int]:
+    """
+    Применяет все ожидающие ревизии по порядку.
+    Каждая ревизия применяется и записывается в schema_version в своей транзакции.
+
+    Returns:
+        Список номеров примененных ревизий
+    """
+    async with engine.begin() as connection:
+        await connection.run_sync(schema_version.create, checkfirst=True)
+
+    async with engine.connect() as connection:
+        current = await get_current_version(connection)
+
+    applied = []
+    for module in load_revisions():
+        if module.revision <= current:
+            continue
+        async with engine.begin() as connection:
+            await connection.run_sync(module.upgrade)
+            await connection.execute(
+                insert(schema_version).values(
+                    version=module.revision,
+                    description=module.description,
+                )
+            )
+        applied.append(module.revision)
+    return applied
+
+
+async def check_schema_version(engine: AsyncEngine) -> None:
+    """
+    Проверяет при старте воркера, что схема БД не отстает от кода.
+    Выполняет один запрос и ничего не изменяет в схеме.
+    """
+    async with engine.connect() as connection:
+        current = await get_current_version(connection)
+    head = head_revision()
+    if current < head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, but the code requires {head}. "
+            f"Run `python -m src.migrations upgrade`."
+        )
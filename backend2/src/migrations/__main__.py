@@ -0,0 +1,36 @@
+import argparse
+import asyncio
+
+from src.database import engine
+from src.migrations import get_current_version, head_revision, upgrade
+
+
+async def run_upgrade():
+    applied = await upgrade(engine)
+    if applied:
+        print(f"Applied revisions: {', '.join(str(revision) for revision in applied)}")
+    else:
+        print("Database schema is up to date")
+
+
+async def show_current():
+    async with engine.connect() as connection:
+        current = await get_current_version(connection)
+    print(f"Current revision: {current}, head revision: {head_revision()}")
+
+
+async def main(command: str):
+    try:
+        if command == "upgrade":
+            await run_upgrade()
+        else:
+            await show_current()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Миграции схемы БД")
+    parser.add_argument("command", choices=["upgrade", "current"])
+    args = parser.parse_args()
+    asyncio.run(main(args.command))
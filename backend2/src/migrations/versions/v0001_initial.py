@@ -0,0 +1,82 @@
+"""
+Исходная схема: users, services, appointments, payments.
+
+Таблицы создаются только если их еще нет, поэтому ревизия безопасна для БД,
+созданных раньше через Base.metadata.create_all.
+"""
+from sqlalchemy import (
+    Boolean,
+    CheckConstraint,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    func,
+)
+
+revision = 1
+description = "initial schema"
+
+metadata = MetaData()
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("login", String(255), unique=True, index=True, nullable=False),
+    Column("password_hash", String(255), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+    Column("full_name", String(255), nullable=False),
+    Column("phone_number", String(20), nullable=False),
+    Column("role", String(50), nullable=False),
+    CheckConstraint(
+        "role IN ('CLIENT', 'VIZAZHIST', 'MANICURIST', 'STYLIST', 'BROWIST')",
+        name="check_user_role"
+    ),
+)
+
+Table(
+    "services",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String(255), nullable=False),
+    Column("duration_quarters", Integer, nullable=False),
+    Column("price", Numeric(10, 2), nullable=False),
+    Column("master_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    CheckConstraint("duration_quarters > 0", name="check_duration_positive"),
+    CheckConstraint("price > 0", name="check_price_positive"),
+)
+
+Table(
+    "appointments",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("client_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("service_id", Integer, ForeignKey("services.id", ondelete="CASCADE"), nullable=False),
+    Column("date", Date, nullable=False),
+    Column("quarter", Integer, nullable=False),
+    Column("status", String(50), nullable=False, default="booked"),
+    Column("is_paid", Boolean, default=False, nullable=False),
+    CheckConstraint("quarter >= 1 AND quarter <= 20", name="check_quarter_range"),
+    CheckConstraint(
+        "status IN ('booked', 'in_progress', 'completed')",
+        name="check_appointment_status"
+    ),
+)
+
+Table(
+    "payments",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("appointment_id", Integer, ForeignKey("appointments.id", ondelete="CASCADE"), nullable=False),
+    Column("amount", Numeric(10, 2), nullable=False),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,39 @@
+"""
+Индексы под основные запросы crud слоя:
+расписание мастера на день, записи клиента, услуги мастера,
+оплаты по записям и список мастеров.
+"""
+from sqlalchemy import Column, Date, Index, Integer, MetaData, String, Table
+
+revision = 2
+description = "hot path indexes"
+
+
+def upgrade(connection):
+    metadata = MetaData()
+    appointments = Table(
+        "appointments",
+        metadata,
+        Column("client_id", Integer),
+        Column("service_id", Integer),
+        Column("date", Date),
+        Column("quarter", Integer),
+    )
+    services = Table("services", metadata, Column("master_id", Integer))
+    payments = Table("payments", metadata, Column("appointment_id", Integer))
+    users = Table("users", metadata, Column("role", String(50)))
+
+    indexes = [
+        Index(
+            "ix_appointments_service_date_quarter",
+            appointments.c.service_id,
+            appointments.c.date,
+            appointments.c.quarter,
+        ),
+        Index("ix_appointments_client_date", appointments.c.client_id, appointments.c.date),
+        Index("ix_services_master_id", services.c.master_id),
+        Index("ix_payments_appointment_id", payments.c.appointment_id),
+        Index("ix_users_role", users.c.role),
+    ]
+    for index in indexes:
+        index.create(connection, checkfirst=True)
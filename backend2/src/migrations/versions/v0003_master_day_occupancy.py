@@ -0,0 +1,62 @@
+"""
+Таблица master_day_occupancy: занятые кварталы мастера на день в виде битовой маски.
+Заполняется по существующим записям.
+"""
+from collections import defaultdict
+
+from sqlalchemy import Column, Date, ForeignKey, Integer, MetaData, Table, insert, select
+
+revision = 3
+description = "master day occupancy bitmask"
+
+metadata = MetaData()
+
+users = Table("users", metadata, Column("id", Integer, primary_key=True))
+services = Table(
+    "services",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("duration_quarters", Integer),
+    Column("master_id", Integer),
+)
+appointments = Table(
+    "appointments",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("service_id", Integer),
+    Column("date", Date),
+    Column("quarter", Integer),
+)
+master_day_occupancy = Table(
+    "master_day_occupancy",
+    metadata,
+    Column("master_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("date", Date, primary_key=True),
+    Column("mask", Integer, nullable=False, default=0),
+)
+
+
+def upgrade(connection):
+    master_day_occupancy.create(connection, checkfirst=True)
+
+    rows = connection.execute(
+        select(
+            services.c.master_id,
+            appointments.c.date,
+            appointments.c.quarter,
+            services.c.duration_quarters,
+        ).join(services, appointments.c.service_id == services.c.id)
+    )
+    masks = defaultdict(int)
+    for master_id, day, quarter, duration in rows:
+        masks[(master_id, day)] |= ((1 << duration) - 1) << (quarter - 1)
+    masks = {key: mask & ((1 << 20) - 1) for key, mask in masks.items()}
+
+    if masks:
+        connection.execute(
+            insert(master_day_occupancy),
+            [
+                {"master_id": master_id, "date": day, "mask": mask}
+                for (master_id, day), mask in masks.items()
+            ],
+        )
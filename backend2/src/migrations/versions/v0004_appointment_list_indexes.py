@@ -0,0 +1,37 @@
+"""
+Индексы под списки записей с сортировкой (date, quarter, id):
+все записи и записи клиента. ix_appointments_client_date заменяется
+более широким ix_appointments_client_date_quarter.
+"""
+from sqlalchemy import Column, Date, Index, Integer, MetaData, Table
+
+revision = 4
+description = "appointment list indexes"
+
+
+def upgrade(connection):
+    metadata = MetaData()
+    appointments = Table(
+        "appointments",
+        metadata,
+        Column("client_id", Integer),
+        Column("date", Date),
+        Column("quarter", Integer),
+    )
+
+    indexes = [
+        Index(
+            "ix_appointments_client_date_quarter",
+            appointments.c.client_id,
+            appointments.c.date,
+            appointments.c.quarter,
+        ),
+        Index("ix_appointments_date_quarter", appointments.c.date, appointments.c.quarter),
+    ]
+    for index in indexes:
+        index.create(connection, checkfirst=True)
+
+    # Новый индекс начинается с client_id, поэтому старый больше не нужен и внешнему ключу
+    Index("ix_appointments_client_date", appointments.c.client_id, appointments.c.date).drop(
+        connection, checkfirst=True
+    )
@@ -0,0 +1,58 @@
+"""
+Колонка appointments.master_id (мастер услуги записи) с индексом (master_id, date, quarter).
+Заполняется из services.master_id. NOT NULL и внешний ключ добавляются только на MySQL:
+SQLite не умеет изменять колонки через ALTER TABLE.
+"""
+from sqlalchemy import Column, Date, Index, Integer, MetaData, Table, inspect, select, text, update
+
+revision = 5
+description = "appointment master_id"
+
+
+def upgrade(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("appointments")}
+    if "master_id" not in columns:
+        connection.execute(text("ALTER TABLE appointments ADD COLUMN master_id INTEGER"))
+
+    metadata = MetaData()
+    appointments = Table(
+        "appointments",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("service_id", Integer),
+        Column("master_id", Integer),
+        Column("date", Date),
+        Column("quarter", Integer),
+    )
+    services = Table(
+        "services",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("master_id", Integer),
+    )
+
+    connection.execute(
+        update(appointments)
+        .where(appointments.c.master_id.is_(None))
+        .values(
+            master_id=select(services.c.master_id)
+            .where(services.c.id == appointments.c.service_id)
+            .scalar_subquery()
+        )
+    )
+
+    if connection.dialect.name == "mysql":
+        connection.execute(text("ALTER TABLE appointments MODIFY master_id INTEGER NOT NULL"))
+        foreign_keys = {fk["name"] for fk in inspect(connection).get_foreign_keys("appointments")}
+        if "fk_appointments_master_id" not in foreign_keys:
+            connection.execute(text(
+                "ALTER TABLE appointments ADD CONSTRAINT fk_appointments_master_id "
+                "FOREIGN KEY (master_id) REFERENCES users (id) ON DELETE CASCADE"
+            ))
+
+    Index(
+        "ix_appointments_master_date_quarter",
+        appointments.c.master_id,
+        appointments.c.date,
+        appointments.c.quarter,
+    ).create(connection, checkfirst=True)
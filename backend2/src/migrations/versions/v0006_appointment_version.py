@@ -0,0 +1,13 @@
+"""
+Колонка appointments.version для оптимистичной блокировки (If-Match при PUT записи).
+"""
+from sqlalchemy import inspect, text
+
+revision = 6
+description = "appointment version"
+
+
+def upgrade(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("appointments")}
+    if "version" not in columns:
+        connection.execute(text("ALTER TABLE appointments ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
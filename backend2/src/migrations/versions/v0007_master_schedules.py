@@ -0,0 +1,32 @@
+"""
+Таблицы рабочего календаря мастеров: недельный шаблон и исключения по датам.
+Без строк календаря мастер работает полный день сетки, как и раньше.
+"""
+from sqlalchemy import CheckConstraint, Column, Date, ForeignKey, Integer, MetaData, Table
+
+revision = 7
+description = "master working schedules"
+
+metadata = MetaData()
+
+users = Table("users", metadata, Column("id", Integer, primary_key=True))
+master_weekly_schedule = Table(
+    "master_weekly_schedule",
+    metadata,
+    Column("master_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("weekday", Integer, primary_key=True),
+    Column("working_mask", Integer, nullable=False),
+    CheckConstraint("weekday >= 0 AND weekday <= 6", name="check_weekday_range"),
+)
+master_schedule_exceptions = Table(
+    "master_schedule_exceptions",
+    metadata,
+    Column("master_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("date", Date, primary_key=True),
+    Column("working_mask", Integer, nullable=False),
+)
+
+
+def upgrade(connection):
+    master_weekly_schedule.create(connection, checkfirst=True)
+    master_schedule_exceptions.create(connection, checkfirst=True)
@@ -2,6 +2,9 @@ from src.models.user import User
 from src.models.service import Service
 from src.models.appointment import Appointment
 from src.models.payment import Payment
+from src.models.occupancy import MasterDayOccupancy
+from src.models.schedule import MasterWeeklySchedule, MasterScheduleException
 
-__all__ = ["User", "Service", "Appointment", "Payment"]
+__all__ = ["User", "Service", "Appointment", "Payment", "MasterDayOccupancy",
+           "MasterWeeklySchedule", "MasterScheduleException"]
 
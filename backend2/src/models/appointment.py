@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, CheckConstraint, Index
 from src.models.base import Base
+from src.workday import QUARTERS_PER_DAY
 
 
 class Appointment(Base):
@@ -8,16 +9,28 @@ class Appointment(Base):
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     service_id = Column(Integer, ForeignKey("services.id", ondelete="CASCADE"), nullable=False)
+    # Мастер услуги (денормализация services.master_id для расписания мастера без JOIN)
+    master_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     date = Column(Date, nullable=False)
     quarter = Column(Integer, nullable=False)
     status = Column(String(50), nullable=False, default="booked")
     is_paid = Column(Boolean, default=False, nullable=False)
+    # Версия записи для оптимистичной блокировки: увеличивается при каждом изменении
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     __table_args__ = (
-        CheckConstraint("quarter >= 1 AND quarter <= 20", name="check_quarter_range"),
+        # Внешняя граница сетки дня; рабочие часы мастера проверяются по его календарю
+        CheckConstraint(f"quarter >= 1 AND quarter <= {QUARTERS_PER_DAY}", name="check_quarter_range"),
         CheckConstraint(
             "status IN ('booked', 'in_progress', 'completed')",
             name="check_appointment_status"
         ),
+        # Расписание услуги на день: проверка пересечений и свободные кварталы
+        Index("ix_appointments_service_date_quarter", "service_id", "date", "quarter"),
+        # Списки записей клиента и всех записей в порядке (date, quarter, id)
+        Index("ix_appointments_client_date_quarter", "client_id", "date", "quarter"),
+        Index("ix_appointments_date_quarter", "date", "quarter"),
+        # Расписание и списки записей мастера
+        Index("ix_appointments_master_date_quarter", "master_id", "date", "quarter"),
     )
 
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey
+from src.models.base import Base
+
+
+class MasterDayOccupancy(Base):
+    """
+    Занятость мастера на день: бит (quarter - 1) маски установлен,
+    если квартал quarter занят записью.
+    Обновляется в той же транзакции, что и записи (src/crud/occupancy.py).
+    """
+    __tablename__ = "master_day_occupancy"
+
+    master_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    mask = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, Index
 from src.models.base import Base
 
 
@@ -9,4 +9,9 @@ class Payment(Base):
     appointment_id = Column(Integer, ForeignKey("appointments.id", ondelete="CASCADE"), nullable=False)
     amount = Column(Numeric(10, 2), nullable=False)
 
+    __table_args__ = (
+        # Оплаты по записям мастера
+        Index("ix_payments_appointment_id", "appointment_id"),
+    )
+
 
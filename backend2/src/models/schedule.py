@@ -0,0 +1,29 @@
+from sqlalchemy import CheckConstraint, Column, Date, ForeignKey, Integer
+from src.models.base import Base
+
+
+class MasterWeeklySchedule(Base):
+    """
+    Недельный шаблон рабочих часов мастера: бит (quarter - 1) маски установлен,
+    если мастер работает в квартал quarter. Маска 0 — выходной.
+    Для дней недели без строки действует полный день сетки.
+    """
+    __tablename__ = "master_weekly_schedule"
+
+    master_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # 0 — понедельник, 6 — воскресенье (date.weekday())
+    weekday = Column(Integer, primary_key=True)
+    working_mask = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint("weekday >= 0 AND weekday <= 6", name="check_weekday_range"),
+    )
+
+
+class MasterScheduleException(Base):
+    """Рабочие часы мастера на конкретную дату вместо недельного шаблона (маска 0 — выходной)"""
+    __tablename__ = "master_schedule_exceptions"
+
+    master_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    working_mask = Column(Integer, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, CheckConstraint, Index
 from src.models.base import Base
 
 
@@ -14,6 +14,8 @@ class Service(Base):
     __table_args__ = (
         CheckConstraint("duration_quarters > 0", name="check_duration_positive"),
         CheckConstraint("price > 0", name="check_price_positive"),
+        # Услуги мастера, join записей с услугами по мастеру
+        Index("ix_services_master_id", "master_id"),
     )
 
 
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, CheckConstraint
+from sqlalchemy import Column, Integer, String, DateTime, CheckConstraint, Index
 from sqlalchemy.sql import func
 from src.models.base import Base
 
+# Роли мастеров (все роли, кроме CLIENT)
+MASTER_ROLES = ("VIZAZHIST", "MANICURIST", "STYLIST", "BROWIST")
+
 
 class User(Base):
     __tablename__ = "users"
@@ -19,6 +22,8 @@ class User(Base):
             "role IN ('CLIENT', 'VIZAZHIST', 'MANICURIST', 'STYLIST', 'BROWIST')",
             name="check_user_role"
         ),
+        # Список мастеров (role != 'CLIENT')
+        Index("ix_users_role", "role"),
     )
 
 
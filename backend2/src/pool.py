@@ -0,0 +1,165 @@
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import Pool
+
+
+class PoolStats:
+    """Счетчики пула соединений одного воркера"""
+
+    # Окно (в секундах), по которому считается частота новых подключений
+    RATE_WINDOW = 60.0
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.connects = 0
+        self.connect_time_total = 0.0
+        self.connect_time_max = 0.0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.checkout_timeouts = 0
+        self.checkins = 0
+        self.hold_time_total = 0.0
+        self.hold_time_max = 0.0
+        self._recent_connects: deque[float] = deque()
+
+    def record_connect(self, connect_time: float) -> None:
+        now = time.monotonic()
+        self.connects += 1
+        self.connect_time_total += connect_time
+        self.connect_time_max = max(self.connect_time_max, connect_time)
+        self._recent_connects.append(now)
+        self._trim(now)
+
+    def record_checkout(self) -> None:
+        self.checkouts += 1
+
+    def record_wait(self, wait_time: float) -> None:
+        self.waits += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def record_timeout(self, wait_time: float) -> None:
+        self.checkout_timeouts += 1
+        self.record_wait(wait_time)
+
+    def record_checkin(self, hold_time: float) -> None:
+        self.checkins += 1
+        self.hold_time_total += hold_time
+        self.hold_time_max = max(self.hold_time_max, hold_time)
+
+    def connects_per_second(self) -> float:
+        now = time.monotonic()
+        self._trim(now)
+        window = min(self.RATE_WINDOW, now - self.started_at) or 1.0
+        return len(self._recent_connects) / window
+
+    def _trim(self, now: float) -> None:
+        while self._recent_connects and now - self._recent_connects[0] > self.RATE_WINDOW:
+            self._recent_connects.popleft()
+
+
+# Статистика пулов по engine (заполняется событиями пула, см. instrument_pool)
+_pool_stats: dict[AsyncEngine, PoolStats] = {}
+
+
+def _time_checkouts(pool: Pool, stats: PoolStats) -> None:
+    """
+    Оборачивает pool.connect(): ожидание свободного соединения (и подключение
+    нового, если пул его открывает) и выдачи, не дождавшиеся DB_POOL_TIMEOUT.
+    """
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            connection = connect()
+        except PoolTimeoutError:
+            stats.record_timeout(time.perf_counter() - started)
+            raise
+        stats.record_wait(time.perf_counter() - started)
+        return connection
+
+    pool.connect = timed_connect
+
+
+def instrument_pool(engine: AsyncEngine) -> None:
+    """
+    Подключает статистику пула engine через публичные события пула:
+    новые подключения и их длительность (do_connect/connect), выдачи соединений
+    (checkout) и время, на которое соединение брали из пула (checkin).
+    Время ожидания соединения измеряется вокруг pool.connect(); dispose() создает
+    новый пул, и обертка ставится на него заново (событие engine_disposed).
+    Слушатели привязаны к engine и переживают пересоздание пула при dispose().
+    """
+    stats = _pool_stats[engine] = PoolStats()
+    _time_checkouts(engine.sync_engine.pool, stats)
+
+    @event.listens_for(engine.sync_engine, "engine_disposed")
+    def _engine_disposed(sync_engine):
+        _time_checkouts(sync_engine.pool, stats)
+
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def _do_connect(dialect, connection_record, cargs, cparams):
+        connection_record.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        started = connection_record.info.pop("connect_started", None)
+        stats.record_connect(time.perf_counter() - started if started is not None else 0.0)
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        stats.record_checkout()
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            stats.record_checkin(time.perf_counter() - checked_out_at)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def get_pool_stats(engine: AsyncEngine, max_overflow: int) -> dict:
+    """Возвращает текущее состояние пула engine"""
+    pool = engine.pool
+    stats = _pool_stats[engine]
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": max_overflow,
+        "connects": stats.connects,
+        "connects_per_second": round(stats.connects_per_second(), 3),
+        "connect_time_avg_ms": _ms(stats.connect_time_total / stats.connects) if stats.connects else 0.0,
+        "connect_time_max_ms": _ms(stats.connect_time_max),
+        "checkouts": stats.checkouts,
+        # Ожидание соединения из пула — сравнивайте с DB_POOL_TIMEOUT
+        "wait_time_avg_ms": _ms(stats.wait_time_total / stats.waits) if stats.waits else 0.0,
+        "wait_time_max_ms": _ms(stats.wait_time_max),
+        "checkout_timeouts": stats.checkout_timeouts,
+        "checkins": stats.checkins,
+        "hold_time_avg_ms": _ms(stats.hold_time_total / stats.checkins) if stats.checkins else 0.0,
+        "hold_time_max_ms": _ms(stats.hold_time_max),
+    }
+
+
+async def warm_up_pool(engine: AsyncEngine, count: int) -> None:
+    """Заранее открывает count соединений, чтобы первые запросы не ждали подключения"""
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(await engine.connect())
+    finally:
+        for connection in connections:
+            await connection.close()
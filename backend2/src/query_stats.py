@@ -0,0 +1,107 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Список плейсхолдеров вида (?, ?, ?) / (%s, %s) — у IN (...) с разным числом id одна форма
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Нормализует SQL, чтобы одинаковые запросы с разными параметрами совпадали"""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(...)", statement)
+
+
+class RequestQueryStats:
+    """Статистика SQL запросов в рамках одного HTTP запроса"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter[str] = Counter()
+        # После возврата обработчика заголовки уже сформированы — дальше не считаем
+        self.closed = False
+
+    def record(self, statement: str, elapsed: float) -> None:
+        if self.closed:
+            return
+        self.count += 1
+        self.total_time += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_statements(self, threshold: int) -> list[tuple[str, int]]:
+        """Формы запросов, выполненные больше threshold раз (признак N+1)"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+# Статистика текущего HTTP запроса (None вне запроса — например, при миграциях)
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context.query_started_at)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подключает подсчет запросов к engine"""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def skip_query_stats(request: Request) -> None:
+    """
+    Отключает заголовки X-DB-* для запроса — для потоковых ответов, чьи запросы
+    выполняются уже после отправки заголовков.
+    """
+    request.state.skip_query_stats = True
+
+
+async def db_query_stats_middleware(request: Request, call_next):
+    """
+    Считает SQL запросы и суммарное время БД на каждый HTTP запрос,
+    отдает их в заголовках X-DB-Queries и X-DB-Time-ms и пишет предупреждение,
+    если одна и та же форма запроса выполнилась больше SQL_REPEATED_STATEMENT_THRESHOLD раз.
+
+    Считаются запросы до возврата обработчика (включая COMMIT в UnitOfWorkRoute,
+    который сам по себе не SQL запрос курсора и в счетчик не входит). Запросы, выполненные
+    позже — при чтении тела потокового ответа или в завершении dependency после отправки
+    ответа, — не учитываются; потоковые эндпоинты (skip_query_stats) заголовков не получают.
+    """
+    stats = RequestQueryStats()
+    token = _current_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        stats.closed = True
+        _current_stats.reset(token)
+
+    if getattr(request.state, "skip_query_stats", False):
+        return response
+
+    response.headers["X-DB-Queries"] = str(stats.count)
+    response.headers["X-DB-Time-ms"] = f"{stats.total_time * 1000:.2f}"
+
+    for shape, count in stats.repeated_statements(settings.SQL_REPEATED_STATEMENT_THRESHOLD):
+        logger.warning(
+            "Possible N+1: %s %s executed the same statement %d times: %s",
+            request.method, request.url.path, count, shape,
+        )
+    return response
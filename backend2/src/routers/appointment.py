@@ -1,140 +1,229 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import json
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import get_db
+from src.database import get_db, get_read_db, ReadSessionLocal, UnitOfWorkRoute
 from src.auth import get_current_user
 from src.models.user import User
-from src.models.service import Service
-from src.models.appointment import Appointment
-from src.schemas.appointment import AppointmentCreate, AppointmentUpdate, AppointmentListResponse, AppointmentDetailResponse
+from src.schemas.appointment import (
+    AppointmentCreate,
+    AppointmentUpdate,
+    AppointmentListResponse,
+    AppointmentDetailResponse,
+    AppointmentListFilter,
+    AppointmentBulkCreate,
+    AppointmentBulkCreateResponse,
+    AppointmentComboCreate,
+    AppointmentSettle,
+    MasterCalendarResponse,
+)
 from src.crud.appointment import (
+    EXPORT_COLUMNS,
+    decode_appointment_cursor,
+    stream_appointments_export,
+    bulk_create_appointments,
+    create_combo_appointments,
     get_all_appointments,
+    get_appointment_details,
+    get_appointments_details,
     get_appointment_by_id,
     create_appointment,
     update_appointment,
     delete_appointment,
     validate_appointment,
     get_appointments_by_client,
-    get_appointments_by_master
+    get_appointments_by_master,
+    get_master_calendar
 )
+from src.crud.payment import settle_appointment
 from src.crud.user import get_user_by_id
-from src.crud.service import get_service_by_id
+from src.crud.service import get_service_by_id, get_services_by_ids
+from src.query_stats import skip_query_stats
+from src.routers.common import check_period
 
-router = APIRouter(prefix="/appointments")
+router = APIRouter(prefix="/appointments", route_class=UnitOfWorkRoute)
 
+# Заголовок ответа с курсором следующей страницы списка записей
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
-def build_appointment_response(appointment: Appointment, client: User, service: Service, master: User) -> AppointmentListResponse:
-    """Вспомогательная функция для построения ответа из записи"""
-    return AppointmentListResponse(
-        id=appointment.id,
-        date=appointment.date,
-        quarter=appointment.quarter,
-        status=appointment.status,
-        is_paid=appointment.is_paid,
-        master_full_name=master.full_name,
-        service_title=service.title,
-        service_price=service.price,
-        client_full_name=client.full_name
+
+def get_list_filter(
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(booked|in_progress|completed)$"),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; without it all records are returned")
+) -> AppointmentListFilter:
+    """Фильтры и страница списка записей из query параметров"""
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_appointment_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    return AppointmentListFilter(
+        status=status_filter,
+        date_from=date_from,
+        date_to=date_to,
+        after=after,
+        limit=limit
     )
 
 
-async def get_appointments_with_details(
-    db: AsyncSession,
-    appointments: list[Appointment]
-) -> list[AppointmentListResponse]:
-    """Получает список записей с полной информацией"""
-    result = []
-    for appointment in appointments:
-        # Получаем информацию о клиенте
-        client = await get_user_by_id(db, appointment.client_id)
-        # Получаем информацию об услуге
-        service = await get_service_by_id(db, appointment.service_id)
-        if service:
-            # Получаем информацию о мастере
-            master = await get_user_by_id(db, service.master_id)
-            if client and master:
-                result.append(build_appointment_response(appointment, client, service, master))
-    return result
+def _detail_response(response: Response, details: dict) -> AppointmentDetailResponse:
+    # Версия записи в ETag — её передают в If-Match при PUT
+    response.headers["ETag"] = f'"{details["version"]}"'
+    return AppointmentDetailResponse(**details)
+
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Версия из заголовка If-Match ("3", W/"3" или 3); None для отсутствующего заголовка и *"""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid If-Match header"
+        )
+
+
+def _list_response(response: Response, appointments: list[dict], next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [AppointmentListResponse(**appointment) for appointment in appointments]
 
 
 @router.get("", response_model=list[AppointmentListResponse])
 async def get_appointments(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    filters: AppointmentListFilter = Depends(get_list_filter),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Получение списка всех записей"""
-    appointments = await get_all_appointments(db)
-    return await get_appointments_with_details(db, appointments)
+    """Получение списка записей (по дате и времени)"""
+    appointments, next_cursor = await get_all_appointments(db, filters)
+    return _list_response(response, appointments, next_cursor)
 
 
 @router.get("/client", response_model=list[AppointmentListResponse])
 async def get_client_appointments(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    filters: AppointmentListFilter = Depends(get_list_filter),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение записей текущего клиента"""
-    appointments = await get_appointments_by_client(db, current_user.id)
-    return await get_appointments_with_details(db, appointments)
+    appointments, next_cursor = await get_appointments_by_client(db, current_user.id, filters)
+    return _list_response(response, appointments, next_cursor)
 
 
 @router.get("/master", response_model=list[AppointmentListResponse])
 async def get_master_appointments(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    filters: AppointmentListFilter = Depends(get_list_filter),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение записей текущего мастера"""
-    appointments = await get_appointments_by_master(db, current_user.id)
-    return await get_appointments_with_details(db, appointments)
+    appointments, next_cursor = await get_appointments_by_master(db, current_user.id, filters)
+    return _list_response(response, appointments, next_cursor)
+
+
+@router.get("/master/calendar", response_model=MasterCalendarResponse)
+async def get_master_calendar_endpoint(
+    date_from: date = Query(..., description="First day of the calendar"),
+    date_to: date = Query(..., description="Last day of the calendar (inclusive)"),
+    master_id: Optional[int] = Query(None, description="Master; current user by default"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Календарь мастера: сетка дней x 20 кварталов с записями"""
+    check_period(date_from, date_to)
+    if master_id is None:
+        master_id = current_user.id
+    days = await get_master_calendar(db, master_id, date_from, date_to)
+    return MasterCalendarResponse(master_id=master_id, days=days)
+
+
+async def _export_lines(export_format: str, date_from, date_to, master_id):
+    # Отдельная сессия живет, пока клиент читает ответ
+    async with ReadSessionLocal() as db:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            yield buffer.getvalue()
+        async for batch in stream_appointments_export(db, date_from, date_to, master_id):
+            if export_format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(batch)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps({column: row[column] for column in EXPORT_COLUMNS}, default=str, ensure_ascii=False) + "\n"
+                    for row in batch
+                )
+
+
+@router.get("/export")
+async def export_appointments(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    master_id: Optional[int] = Query(None),
+    current_user: User = Depends(get_current_user)
+):
+    """Потоковая выгрузка записей в NDJSON или CSV (по дате и времени)"""
+    # Запросы выгрузки выполняются после отправки заголовков — X-DB-* были бы неполными
+    skip_query_stats(request)
+    if export_format == "csv":
+        media_type = "text/csv"
+    else:
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        _export_lines(export_format, date_from, date_to, master_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="appointments.{export_format}"'}
+    )
 
 
 @router.get("/{appointment_id}", response_model=AppointmentDetailResponse)
 async def get_appointment(
     appointment_id: int,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение записи по ID"""
-    appointment = await get_appointment_by_id(db, appointment_id)
+    appointment = await get_appointment_details(db, appointment_id)
     if not appointment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Appointment not found"
         )
-    
-    # Получаем информацию о клиенте
-    client = await get_user_by_id(db, appointment.client_id)
-    # Получаем информацию об услуге
-    service = await get_service_by_id(db, appointment.service_id)
-    if not service:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Service not found"
-        )
-    
-    # Получаем информацию о мастере
-    master = await get_user_by_id(db, service.master_id)
-    if not master or not client:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Related entity not found"
-        )
-    
-    return AppointmentDetailResponse(
-        id=appointment.id,
-        date=appointment.date,
-        quarter=appointment.quarter,
-        status=appointment.status,
-        is_paid=appointment.is_paid,
-        master_full_name=master.full_name,
-        service_title=service.title,
-        service_price=service.price,
-        client_full_name=client.full_name
-    )
+    return _detail_response(response, appointment)
 
 
 @router.post("", response_model=AppointmentDetailResponse, status_code=status.HTTP_201_CREATED)
 async def create_appointment_endpoint(
     appointment_create: AppointmentCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -170,7 +259,13 @@ async def create_appointment_endpoint(
             detail=error_message
         )
     
+    # Кварталы занимаются атомарно: параллельный запрос мог успеть занять их после проверки
     appointment = await create_appointment(db, appointment_create)
+    if not appointment:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Appointment overlaps with existing appointment"
+        )
     
     # Получаем информацию о мастере для ответа
     master = await get_user_by_id(db, service.master_id)
@@ -180,63 +275,148 @@ async def create_appointment_endpoint(
             detail="Master not found"
         )
     
-    return AppointmentDetailResponse(
+    return _detail_response(response, dict(
         id=appointment.id,
         date=appointment.date,
         quarter=appointment.quarter,
         status=appointment.status,
         is_paid=appointment.is_paid,
+        version=appointment.version,
         master_full_name=master.full_name,
         service_title=service.title,
         service_price=service.price,
         client_full_name=client.full_name
+    ))
+
+
+@router.post("/bulk", response_model=AppointmentBulkCreateResponse)
+async def bulk_create_appointments_endpoint(
+    bulk_create: AppointmentBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Пакетное создание записей (импорт расписаний).
+    Каждая запись проверяется так же, как при POST /appointments; записи с ошибками
+    пропускаются, остальные создаются в одной транзакции.
+    """
+    results = await bulk_create_appointments(db, bulk_create.items)
+    failed = sum(1 for result in results if result["error"])
+    return AppointmentBulkCreateResponse(
+        created=len(results) - failed,
+        failed=failed,
+        results=results
     )
 
 
+@router.post("/combo", response_model=list[AppointmentListResponse], status_code=status.HTTP_201_CREATED)
+async def create_combo_appointments_endpoint(
+    combo_create: AppointmentComboCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Запись на несколько услуг подряд (цепочка из GET /availability/combo).
+    Создаются все записи цепочки или ни одной.
+    """
+    client = await get_user_by_id(db, combo_create.client_id)
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found"
+        )
+
+    found = await get_services_by_ids(db, combo_create.service_ids)
+    if len(found) != len(set(combo_create.service_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Service not found"
+        )
+
+    appointment_ids, error_message = await create_combo_appointments(
+        db,
+        client_id=combo_create.client_id,
+        services=[found[service_id] for service_id in combo_create.service_ids],
+        appointment_date=combo_create.date,
+        quarter=combo_create.quarter
+    )
+    if error_message:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_message
+        )
+    return await get_appointments_details(db, appointment_ids)
+
+
 @router.put("/{appointment_id}", response_model=AppointmentDetailResponse)
 async def update_appointment_endpoint(
     appointment_id: int,
     appointment_update: AppointmentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Обновление записи (статус и статус оплаты)"""
+    """
+    Обновление записи (статус и статус оплаты).
+    Если передана версия (If-Match или поле version), запись обновляется, только если
+    её с тех пор никто не изменил, иначе 409.
+    """
     update_data = appointment_update.model_dump(exclude_unset=True)
-    appointment = await update_appointment(db, appointment_id, update_data)
+    body_version = update_data.pop("version", None)
+    expected_version = _parse_if_match(if_match)
+    if expected_version is None:
+        expected_version = body_version
+    updated = await update_appointment(db, appointment_id, update_data, expected_version)
     
-    if not appointment:
+    if not updated:
+        if expected_version is not None and await get_appointment_by_id(db, appointment_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Appointment was modified by another request"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Appointment not found"
         )
     
-    # Получаем информацию для ответа
-    client = await get_user_by_id(db, appointment.client_id)
-    service = await get_service_by_id(db, appointment.service_id)
-    if not service:
+    # Получаем информацию для ответа одним запросом
+    details = await get_appointment_details(db, appointment_id)
+    if not details:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Service not found"
+            detail="Appointment not found"
         )
-    
-    master = await get_user_by_id(db, service.master_id)
-    if not master or not client:
+    return _detail_response(response, details)
+
+
+@router.post("/{appointment_id}/settle", response_model=AppointmentDetailResponse)
+async def settle_appointment_endpoint(
+    appointment_id: int,
+    response: Response,
+    settle: Optional[AppointmentSettle] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Оплата записи: отмечает запись оплаченной и создает оплату одной транзакцией"""
+    appointment = await get_appointment_by_id(db, appointment_id)
+    if not appointment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Related entity not found"
+            detail="Appointment not found"
         )
-    
-    return AppointmentDetailResponse(
-        id=appointment.id,
-        date=appointment.date,
-        quarter=appointment.quarter,
-        status=appointment.status,
-        is_paid=appointment.is_paid,
-        master_full_name=master.full_name,
-        service_title=service.title,
-        service_price=service.price,
-        client_full_name=client.full_name
-    )
+
+    payment = None
+    if not appointment.is_paid:
+        payment = await settle_appointment(db, appointment, settle.amount if settle else None)
+    if not payment:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Appointment is already paid"
+        )
+
+    details = await get_appointment_details(db, appointment_id)
+    return _detail_response(response, details)
 
 
 @router.delete("/{appointment_id}", status_code=status.HTTP_204_NO_CONTENT)
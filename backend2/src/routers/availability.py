@@ -0,0 +1,89 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth import get_current_user
+from src.crud.availability import find_combo_chains, find_earliest_slots, get_services_availability
+from src.crud.service import get_services_by_ids, get_services_by_master_id
+from src.database import get_read_db
+from src.models.user import User
+from src.routers.common import check_period
+from src.schemas.availability import ComboChain, EarliestSlot, ServiceAvailability
+from src.workday import QUARTERS_PER_DAY
+
+router = APIRouter(prefix="/availability")
+
+
+@router.get("", response_model=list[ServiceAvailability])
+async def get_availability(
+    date_from: date = Query(..., description="First date of the period"),
+    date_to: date = Query(..., description="Last date of the period (inclusive)"),
+    master_id: Optional[int] = Query(None, description="All services of the master"),
+    service_ids: Optional[list[int]] = Query(None, description="Services to check"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Свободные кварталы услуг мастера или списка услуг на каждую дату периода"""
+    if (master_id is None) == (not service_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Specify either master_id or service_ids"
+        )
+    check_period(date_from, date_to)
+
+    if master_id is not None:
+        services = await get_services_by_master_id(db, master_id)
+    else:
+        found = await get_services_by_ids(db, service_ids)
+        if len(found) != len(set(service_ids)):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Service not found"
+            )
+        services = list(found.values())
+
+    return await get_services_availability(db, services, date_from, date_to)
+
+
+@router.get("/earliest", response_model=list[EarliestSlot])
+async def get_earliest_slots(
+    role: str = Query(..., pattern="^(VIZAZHIST|MANICURIST|STYLIST|BROWIST)$", description="Master role"),
+    date_from: date = Query(..., description="First date of the search window"),
+    date_to: date = Query(..., description="Last date of the search window (inclusive)"),
+    title: Optional[str] = Query(None, description="Exact service title"),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Ближайшие свободные слоты у любого мастера указанной роли"""
+    check_period(date_from, date_to)
+    return await find_earliest_slots(db, role, title, date_from, date_to, limit)
+
+
+@router.get("/combo", response_model=list[ComboChain])
+async def get_combo_chains(
+    service_ids: list[int] = Query(..., description="Services in the order of the visit"),
+    date_from: date = Query(..., description="First date of the search window"),
+    date_to: date = Query(..., description="Last date of the search window (inclusive)"),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Цепочки записей на несколько услуг подряд (в том числе у разных мастеров)"""
+    if len(service_ids) > QUARTERS_PER_DAY:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Too many services"
+        )
+    check_period(date_from, date_to)
+
+    found = await get_services_by_ids(db, service_ids)
+    if len(found) != len(set(service_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Service not found"
+        )
+    services = [found[service_id] for service_id in service_ids]
+    return await find_combo_chains(db, services, date_from, date_to, limit)
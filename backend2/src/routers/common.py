@@ -0,0 +1,19 @@
+from datetime import date
+
+from fastapi import HTTPException, status
+
+from src.config import settings
+
+
+def check_period(date_from: date, date_to: date) -> None:
+    """Проверяет период date_from..date_to (включительно): порядок дат и AVAILABILITY_MAX_DAYS"""
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_to must not be earlier than date_from"
+        )
+    if (date_to - date_from).days + 1 > settings.AVAILABILITY_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Period must not exceed {settings.AVAILABILITY_MAX_DAYS} days"
+        )
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import get_db
+from src.database import get_db, get_read_db, UnitOfWorkRoute
 from src.auth import get_current_user
 from src.models.user import User
 from src.schemas.payment import PaymentCreate, PaymentResponse
@@ -10,12 +10,12 @@ from src.crud.appointment import get_appointment_by_id
 from src.crud.service import get_service_by_id
 from src.crud.user import get_user_by_id
 
-router = APIRouter(prefix="/payments")
+router = APIRouter(prefix="/payments", route_class=UnitOfWorkRoute)
 
 
 @router.get("/me", response_model=list[PaymentResponse])
 async def get_my_payments(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение списка оплат для текущего мастера"""
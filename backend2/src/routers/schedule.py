@@ -0,0 +1,154 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth import get_current_user
+from src.crud.schedule import (
+    delete_schedule_exception,
+    get_schedule_exceptions,
+    get_weekly_schedule,
+    intervals_to_mask,
+    mask_to_intervals,
+    replace_weekly_schedule,
+    set_schedule_exception,
+)
+from src.crud.user import get_user_by_id
+from src.database import get_db, get_read_db, UnitOfWorkRoute
+from src.models.user import User
+from src.schemas.schedule import (
+    MasterScheduleResponse,
+    ScheduleExceptionResponse,
+    ScheduleExceptionUpdate,
+    WeeklyScheduleUpdate,
+    WorkingInterval,
+)
+from src.workday import FULL_DAY_MASK
+
+router = APIRouter(prefix="/schedules", route_class=UnitOfWorkRoute)
+
+
+async def _check_master(db: AsyncSession, master_id: int) -> None:
+    master = await get_user_by_id(db, master_id)
+    if not master or master.role == "CLIENT":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Master not found"
+        )
+
+
+def _check_owner(current_user: User, master_id: int) -> None:
+    """Календарь меняет только сам мастер"""
+    if current_user.id != master_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the master can change their schedule"
+        )
+
+
+def _intervals_mask(intervals: list[WorkingInterval]) -> int:
+    """Маска рабочих кварталов; 400, если интервал задан концом раньше начала"""
+    for interval in intervals:
+        if interval.end_quarter < interval.start_quarter:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_quarter must not be less than start_quarter"
+            )
+    return intervals_to_mask((interval.start_quarter, interval.end_quarter) for interval in intervals)
+
+
+def _intervals(mask: int) -> list[dict]:
+    return [
+        {"start_quarter": start_quarter, "end_quarter": end_quarter}
+        for start_quarter, end_quarter in mask_to_intervals(mask)
+    ]
+
+
+async def _schedule_response(
+    db: AsyncSession,
+    master_id: int,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> dict:
+    weekly = {row.weekday: row.working_mask for row in await get_weekly_schedule(db, master_id)}
+    exceptions = await get_schedule_exceptions(db, master_id, date_from, date_to)
+    return {
+        "master_id": master_id,
+        "weekly": [
+            {"weekday": weekday, "intervals": _intervals(weekly.get(weekday, FULL_DAY_MASK))}
+            for weekday in range(7)
+        ],
+        "exceptions": [
+            {"date": exception.date, "intervals": _intervals(exception.working_mask)}
+            for exception in exceptions
+        ],
+    }
+
+
+@router.get("/masters/{master_id}", response_model=MasterScheduleResponse)
+async def get_master_schedule(
+    master_id: int,
+    date_from: Optional[date] = Query(None, description="First date of exceptions"),
+    date_to: Optional[date] = Query(None, description="Last date of exceptions (inclusive)"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Рабочий календарь мастера: недельный шаблон и исключения по датам"""
+    await _check_master(db, master_id)
+    return await _schedule_response(db, master_id, date_from, date_to)
+
+
+@router.put("/masters/{master_id}/weekly", response_model=MasterScheduleResponse)
+async def update_weekly_schedule(
+    master_id: int,
+    schedule: WeeklyScheduleUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Замена недельного шаблона рабочих часов мастера"""
+    _check_owner(current_user, master_id)
+    await _check_master(db, master_id)
+    masks = {}
+    for day in schedule.days:
+        if day.weekday in masks:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Duplicate weekday"
+            )
+        masks[day.weekday] = _intervals_mask(day.intervals)
+    await replace_weekly_schedule(db, master_id, masks)
+    return await _schedule_response(db, master_id)
+
+
+@router.put("/masters/{master_id}/exceptions/{day}", response_model=ScheduleExceptionResponse)
+async def update_schedule_exception(
+    master_id: int,
+    day: date,
+    exception: ScheduleExceptionUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Рабочие часы мастера на дату вместо недельного шаблона (пустой список — выходной)"""
+    _check_owner(current_user, master_id)
+    await _check_master(db, master_id)
+    mask = _intervals_mask(exception.intervals)
+    await set_schedule_exception(db, master_id, day, mask)
+    return {"date": day, "intervals": _intervals(mask)}
+
+
+@router.delete("/masters/{master_id}/exceptions/{day}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_schedule_exception_endpoint(
+    master_id: int,
+    day: date,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Удаление исключения: на дату снова действует недельный шаблон"""
+    _check_owner(current_user, master_id)
+    deleted = await delete_schedule_exception(db, master_id, day)
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Schedule exception not found"
+        )
@@ -2,7 +2,7 @@ from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import get_db
+from src.database import get_db, get_read_db, UnitOfWorkRoute
 from src.auth import get_current_user
 from src.models.user import User
 from src.models.service import Service
@@ -16,23 +16,24 @@ from src.crud.service import (
     delete_service,
     get_services_by_master_id
 )
-from src.crud.user import get_user_by_id
+from src.crud.user import get_user_by_id, get_users_by_ids
 
-router = APIRouter(prefix="/services")
+router = APIRouter(prefix="/services", route_class=UnitOfWorkRoute)
 
 
 @router.get("", response_model=list[ServiceListResponse])
 async def get_services(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение списка всех услуг с информацией о мастере"""
     services = await get_all_services(db)
+    # Мастеров всех услуг загружаем одним запросом
+    masters = await get_users_by_ids(db, [service.master_id for service in services])
     
     result = []
     for service in services:
-        # Получаем информацию о мастере
-        master = await get_user_by_id(db, service.master_id)
+        master = masters.get(service.master_id)
         if master:
             result.append(ServiceListResponse(
                 id=service.id,
@@ -50,7 +51,7 @@ async def get_services(
 
 @router.get("/masters/me", response_model=list[ServiceListResponse])
 async def get_my_services(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение услуг текущего мастера"""
@@ -80,7 +81,7 @@ async def get_my_services(
 @router.get("/masters/{master_id}", response_model=list[ServiceListResponse])
 async def get_master_services(
     master_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение услуг мастера по его ID"""
@@ -114,7 +115,7 @@ async def get_master_services(
 async def get_free_quarters_endpoint(
     service_id: int,
     date: date = Query(..., description="Date for checking free quarters"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение свободных кварталов для услуги на указанную дату"""
@@ -133,7 +134,7 @@ async def get_free_quarters_endpoint(
 @router.get("/{service_id}", response_model=ServiceListResponse)
 async def get_service(
     service_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение услуги по ID"""
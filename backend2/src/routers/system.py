@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, Query
+
+from src.auth import get_admin_user
+from src.config import settings
+from src.crud.occupancy import occupancy_cache
+from src.crud.schedule import schedule_cache
+from src.database import HAS_REPLICA, engine, read_engine
+from src.models.user import User
+from src.pool import get_pool_stats
+from src.slow_query_log import read_slow_queries
+
+router = APIRouter(prefix="/system")
+
+
+@router.get("/pool")
+async def get_pool_statistics(
+    current_user: User = Depends(get_admin_user)
+):
+    """Статистика пулов соединений с БД текущего воркера (пул реплики — если она задана)"""
+    pools = {"primary": get_pool_stats(engine, settings.DB_MAX_OVERFLOW)}
+    if HAS_REPLICA:
+        pools["read"] = get_pool_stats(read_engine, settings.DB_MAX_OVERFLOW)
+    return pools
+
+
+@router.get("/slow-queries")
+def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: User = Depends(get_admin_user)
+):
+    """Последние записи журнала медленных запросов текущего воркера"""
+    return read_slow_queries(limit)
+
+
+@router.get("/occupancy-cache")
+def get_occupancy_cache_statistics(
+    current_user: User = Depends(get_admin_user)
+):
+    """Статистика кэша занятости мастеров текущего воркера"""
+    return occupancy_cache.stats()
+
+
+@router.get("/schedule-cache")
+def get_schedule_cache_statistics(
+    current_user: User = Depends(get_admin_user)
+):
+    """Статистика кэша рабочих календарей мастеров текущего воркера"""
+    return schedule_cache.stats()
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import get_db
+from src.database import get_db, get_read_db, UnitOfWorkRoute
 from src.auth import get_current_user
 from src.models.user import User
 from src.schemas.user import UserResponse, UserUpdate, MasterResponse
 from src.crud.user import get_all_masters, update_user
 
-router = APIRouter(prefix="/users")
+router = APIRouter(prefix="/users", route_class=UnitOfWorkRoute)
 
 
 @router.get("/me", response_model=UserResponse)
@@ -36,7 +36,7 @@ async def update_current_user(
 
 @router.get("/masters", response_model=list[MasterResponse])
 async def get_masters(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получение списка всех мастеров с количеством услуг"""
@@ -3,12 +3,14 @@ from decimal import Decimal
 from typing import Optional
 from pydantic import BaseModel, Field
 
+from src.workday import QUARTERS_PER_DAY
+
 
 class AppointmentCreate(BaseModel):
     client_id: int
     service_id: int
     date: date
-    quarter: int = Field(ge=1, le=20)
+    quarter: int = Field(ge=1, le=QUARTERS_PER_DAY)
     status: str = Field(default="booked", pattern="^(booked|in_progress|completed)$")
     is_paid: bool = False
 
@@ -19,6 +21,7 @@ class AppointmentListResponse(BaseModel):
     quarter: int
     status: str
     is_paid: bool
+    version: int
     master_full_name: str
     service_title: str
     service_price: Decimal
@@ -35,4 +38,62 @@ class AppointmentDetailResponse(AppointmentListResponse):
 class AppointmentUpdate(BaseModel):
     status: Optional[str] = Field(None, pattern="^(booked|in_progress|completed)$")
     is_paid: Optional[bool] = None
+    # Ожидаемая версия записи (альтернатива заголовку If-Match)
+    version: Optional[int] = None
+
+
+class AppointmentListFilter(BaseModel):
+    # Фильтры и страница списка записей (сортировка по дате, кварталу и id)
+    status: Optional[str] = Field(None, pattern="^(booked|in_progress|completed)$")
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    # Позиция (date, quarter, id) последней записи предыдущей страницы
+    after: Optional[tuple[date, int, int]] = None
+    limit: Optional[int] = Field(None, ge=1)
+
+
+class AppointmentBulkCreate(BaseModel):
+    items: list[AppointmentCreate] = Field(min_length=1, max_length=1000)
+
+
+class AppointmentBulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class AppointmentBulkCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[AppointmentBulkItemResult]
+
+
+class AppointmentComboCreate(BaseModel):
+    client_id: int
+    # Услуги в порядке визита: записи идут одна за другой без перерывов
+    service_ids: list[int] = Field(min_length=1, max_length=QUARTERS_PER_DAY)
+    date: date
+    # Квартал начала первой записи
+    quarter: int = Field(ge=1, le=QUARTERS_PER_DAY)
+
+
+class AppointmentSettle(BaseModel):
+    # Сумма оплаты; по умолчанию — цена услуги
+    amount: Optional[Decimal] = Field(None, gt=0)
+
+
+class CalendarCell(BaseModel):
+    id: int
+    service_title: str
+    status: str
+
+
+class CalendarDay(BaseModel):
+    date: date
+    # Кварталы сетки дня: запись, занимающая квартал, или null
+    quarters: list[Optional[CalendarCell]]
+
 
+class MasterCalendarResponse(BaseModel):
+    master_id: int
+    days: list[CalendarDay]
@@ -0,0 +1,45 @@
+from datetime import date
+from decimal import Decimal
+from pydantic import BaseModel
+
+
+class DayAvailability(BaseModel):
+    date: date
+    free_quarters: list[int]
+
+
+class ServiceAvailability(BaseModel):
+    service_id: int
+    title: str
+    master_id: int
+    duration_quarters: int
+    days: list[DayAvailability]
+
+
+class EarliestSlot(BaseModel):
+    date: date
+    quarter: int
+    master_id: int
+    master_full_name: str
+    service_id: int
+    service_title: str
+    service_price: Decimal
+    duration_quarters: int
+
+
+class ComboItem(BaseModel):
+    quarter: int
+    master_id: int
+    master_full_name: str
+    service_id: int
+    service_title: str
+    service_price: Decimal
+    duration_quarters: int
+
+
+class ComboChain(BaseModel):
+    date: date
+    start_quarter: int
+    end_quarter: int
+    total_price: Decimal
+    items: list[ComboItem]
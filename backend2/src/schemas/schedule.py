@@ -0,0 +1,39 @@
+from datetime import date
+from pydantic import BaseModel, Field
+
+from src.workday import QUARTERS_PER_DAY
+
+
+class WorkingInterval(BaseModel):
+    # Рабочие кварталы start_quarter .. end_quarter включительно
+    start_quarter: int = Field(ge=1, le=QUARTERS_PER_DAY)
+    end_quarter: int = Field(ge=1, le=QUARTERS_PER_DAY)
+
+
+class WeeklyScheduleDay(BaseModel):
+    # 0 — понедельник, 6 — воскресенье
+    weekday: int = Field(ge=0, le=6)
+    # Пустой список — выходной
+    intervals: list[WorkingInterval]
+
+
+class WeeklyScheduleUpdate(BaseModel):
+    # Дни недели, которых нет в списке, — полный день сетки
+    days: list[WeeklyScheduleDay] = Field(max_length=7)
+
+
+class ScheduleExceptionUpdate(BaseModel):
+    # Пустой список — выходной
+    intervals: list[WorkingInterval] = []
+
+
+class ScheduleExceptionResponse(BaseModel):
+    date: date
+    intervals: list[WorkingInterval]
+
+
+class MasterScheduleResponse(BaseModel):
+    master_id: int
+    # Все 7 дней недели с учетом значений по умолчанию
+    weekly: list[WeeklyScheduleDay]
+    exceptions: list[ScheduleExceptionResponse]
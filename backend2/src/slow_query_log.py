@@ -0,0 +1,175 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Optional
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Отдельный логгер, который пишет только в ротируемый файл журнала воркера (см. _log_path)
+_slow_query_logger = logging.getLogger("src.slow_queries")
+_slow_query_logger.propagate = False
+
+# Фоновые задачи EXPLAIN (держим ссылки, чтобы их не собрал GC)
+_explain_tasks: set[asyncio.Task] = set()
+
+# Execution option, которым помечается сам EXPLAIN, чтобы не логировать его
+_SKIP_OPTION = "skip_slow_query_log"
+
+
+def _log_path() -> str:
+    """
+    Файл журнала текущего процесса: SLOW_QUERY_LOG_PATH с pid воркера.
+    RotatingFileHandler не согласует ротацию между процессами,
+    поэтому воркеры не делят один файл.
+    """
+    root, extension = os.path.splitext(settings.SLOW_QUERY_LOG_PATH)
+    return f"{root}.{os.getpid()}{extension}"
+
+
+def _get_file_logger() -> logging.Logger:
+    if not _slow_query_logger.handlers:
+        directory = os.path.dirname(settings.SLOW_QUERY_LOG_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = RotatingFileHandler(
+            _log_path(),
+            maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _slow_query_logger.addHandler(handler)
+        _slow_query_logger.setLevel(logging.INFO)
+    return _slow_query_logger
+
+
+def _calling_crud_function() -> Optional[str]:
+    """
+    Ищет в стеке функцию crud слоя, которая выполнила запрос, например
+    crud.appointment.get_appointments_by_master_and_date.
+    Синхронный код SQLAlchemy выполняется в дочернем greenlet,
+    поэтому стек просматривается и во всех родительских greenlet.
+    """
+    current = greenlet.getcurrent()
+    frame = sys._getframe(1)
+    while True:
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "")
+            if module.startswith("src.crud."):
+                return f"{module[len('src.'):]}.{frame.f_code.co_name}"
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return None
+        frame = current.gr_frame
+
+
+def _parameter_shape(parameters: Any) -> Any:
+    """Типы параметров запроса без самих значений"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _explain_prefix(dialect_name: str) -> str:
+    return "EXPLAIN QUERY PLAN " if dialect_name == "sqlite" else "EXPLAIN "
+
+
+async def _explain_and_log(engine: AsyncEngine, record: dict, statement: str, parameters: Any) -> None:
+    try:
+        async with engine.connect() as connection:
+            result = await connection.exec_driver_sql(
+                _explain_prefix(engine.dialect.name) + statement,
+                parameters,
+                execution_options={_SKIP_OPTION: True},
+            )
+            record["explain"] = [
+                {key: str(value) for key, value in row.items()}
+                for row in result.mappings().all()
+            ]
+    except Exception as e:
+        record["explain_error"] = str(e)
+    _get_file_logger().info(json.dumps(record, ensure_ascii=False))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.slow_query_started_at = time.perf_counter()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подключает журнал медленных запросов к engine"""
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+    if threshold <= 0:
+        return
+
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context.slow_query_started_at
+        if elapsed < threshold or context.execution_options.get(_SKIP_OPTION):
+            return
+
+        record = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed * 1000, 2),
+            "statement": statement,
+            "parameters": _parameter_shape(parameters[0] if executemany else parameters),
+            "executemany": executemany,
+            "caller": _calling_crud_function(),
+        }
+
+        # EXPLAIN имеет смысл только для одиночных SELECT; выполняется в фоне,
+        # на отдельном соединении и вне статистики текущего HTTP запроса
+        if executemany or not statement.lstrip().upper().startswith("SELECT"):
+            _get_file_logger().info(json.dumps(record, ensure_ascii=False))
+            return
+        # Медленные запросы идут пачками, когда пул и так исчерпан: EXPLAIN сверх
+        # лимита не запускаются, а не ждут соединения вместе с запросами пользователей
+        if len(_explain_tasks) >= settings.SLOW_QUERY_EXPLAIN_CONCURRENCY:
+            record["explain_skipped"] = True
+            _get_file_logger().info(json.dumps(record, ensure_ascii=False))
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            _get_file_logger().info(json.dumps(record, ensure_ascii=False))
+            return
+        task = loop.create_task(
+            _explain_and_log(engine, record, statement, parameters),
+            context=contextvars.Context(),
+        )
+        _explain_tasks.add(task)
+        task.add_done_callback(_explain_tasks.discard)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def read_slow_queries(limit: int) -> list[dict]:
+    """Последние limit записей журнала медленных запросов текущего воркера (новые первыми)"""
+    try:
+        with open(_log_path(), encoding="utf-8") as log_file:
+            lines = deque(log_file, maxlen=limit)
+    except FileNotFoundError:
+        return []
+
+    records = []
+    for line in reversed(lines):
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            logger.warning("Skipping malformed slow query log line")
+    return records
@@ -0,0 +1,23 @@
+# Сетка рабочего дня: кварталы по 30 минут, квартал 1 начинается в 08:00.
+# Рабочие часы конкретного мастера задаются календарем (src/crud/schedule.py)
+# внутри этой сетки.
+
+# Количество кварталов в сетке дня
+QUARTERS_PER_DAY = 20
+# Начало первого квартала (минуты от полуночи) и длина квартала в минутах
+DAY_START_MINUTES = 8 * 60
+QUARTER_MINUTES = 30
+
+FULL_DAY_MASK = (1 << QUARTERS_PER_DAY) - 1
+
+
+def quarter_to_time(quarter: int) -> str:
+    """Преобразует квартал в время в формате HH:MM"""
+    # Quarter 1 = 8:00, quarter 2 = 8:30, и т.д.
+    minutes = DAY_START_MINUTES + (quarter - 1) * QUARTER_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def quarters_mask(quarter: int, duration_quarters: int) -> int:
+    """Маска кварталов quarter .. quarter + duration_quarters - 1"""
+    return (((1 << duration_quarters) - 1) << (quarter - 1)) & FULL_DAY_MASK
@@ -0,0 +1,63 @@
+"""
+Общая настройка тестов: временные SQLite файлы вместо MySQL.
+Основная БД и реплика — два разных файла; переменные окружения задаются
+до импорта src, потому что engine создаются при импорте src.database.
+Зависимости тестов — requirements-dev.txt.
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TMP_DIR = tempfile.mkdtemp(prefix="beauty-salon-tests-")
+PRIMARY_DB = os.path.join(TMP_DIR, "primary.db")
+REPLICA_DB = os.path.join(TMP_DIR, "replica.db")
+
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{PRIMARY_DB}"
+os.environ["DATABASE_REPLICA_URL"] = f"sqlite+aiosqlite:///{REPLICA_DB}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def run(coroutine):
+    """
+    Выполняет корутину в новом event loop и закрывает соединения пулов:
+    соединения aiosqlite привязаны к loop, в котором открыты.
+    """
+    from src.database import dispose_engine
+
+    async def wrapper():
+        try:
+            return await coroutine
+        finally:
+            await dispose_engine()
+
+    return asyncio.run(wrapper())
+
+
+def replicate() -> None:
+    """«Репликация»: копирует содержимое основной БД в файл реплики"""
+    source = sqlite3.connect(PRIMARY_DB)
+    target = sqlite3.connect(REPLICA_DB)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_databases():
+    """Применяет миграции к основной БД и копирует схему на реплику"""
+    from src.database import engine
+    from src.migrations import upgrade
+
+    run(upgrade(engine))
+    replicate()
+    yield
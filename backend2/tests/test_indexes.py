@@ -0,0 +1,200 @@
+"""
+Планы запросов crud на SQLite после миграций: каждый запрос чтения
+должен идти по индексу, а не полным просмотром таблицы (SCAN <table>).
+"""
+import re
+import uuid
+from datetime import date
+from typing import NamedTuple
+
+import pytest
+from sqlalchemy import event
+
+from conftest import run
+from src.crud.appointment import (
+    get_all_appointments,
+    get_appointment_by_id,
+    get_appointment_details,
+    get_appointments_by_client,
+    get_appointments_by_master,
+    get_appointments_by_master_and_date,
+    get_appointments_details,
+    get_free_quarters,
+    get_master_calendar,
+    stream_appointments_export,
+    validate_appointment,
+)
+from src.crud.availability import find_combo_chains, find_earliest_slots, get_services_availability
+from src.crud.occupancy import get_master_day_mask, get_master_day_masks, occupancy_cache
+from src.crud.payment import get_payments_by_master
+from src.crud.schedule import get_schedule_exceptions, get_weekly_schedule, get_working_calendars, schedule_cache
+from src.crud.service import get_all_services, get_services_by_ids, get_services_by_master_id
+from src.crud.user import get_all_masters, get_user_by_id, get_user_by_login
+from src.database import AsyncSessionLocal, engine
+from src.models.appointment import Appointment
+from src.models.occupancy import MasterDayOccupancy
+from src.models.payment import Payment
+from src.models.schedule import MasterScheduleException, MasterWeeklySchedule
+from src.models.service import Service
+from src.models.user import User
+from src.schemas.appointment import AppointmentListFilter
+
+DAY = date(2030, 1, 15)
+
+# Полные просмотры, которые нужны по смыслу запроса: функция -> таблица
+ALLOWED_SCANS = {
+    # Список всех услуг без фильтра читает всю таблицу
+    "get_all_services": {"services"},
+}
+
+
+class Seed(NamedTuple):
+    master: User
+    client: User
+    service: Service
+    appointment: Appointment
+
+
+async def _seed(db) -> Seed:
+    suffix = uuid.uuid4().hex[:8]
+    master = User(login=f"master-{suffix}", password_hash="-", full_name="Master", phone_number="1", role="STYLIST")
+    client = User(login=f"client-{suffix}", password_hash="-", full_name="Client", phone_number="2", role="CLIENT")
+    db.add_all([master, client])
+    await db.flush()
+    service = Service(title="Haircut", duration_quarters=2, price=100, master_id=master.id)
+    db.add(service)
+    await db.flush()
+    # Занятый день: validate_appointment дойдет до запроса пересечений
+    appointment = Appointment(client_id=client.id, service_id=service.id, master_id=master.id, date=DAY, quarter=1)
+    db.add(appointment)
+    db.add(MasterDayOccupancy(master_id=master.id, date=DAY, mask=0b11))
+    db.add(MasterWeeklySchedule(master_id=master.id, weekday=DAY.weekday(), working_mask=0b1111))
+    db.add(MasterScheduleException(master_id=master.id, date=DAY, working_mask=0b111))
+    await db.flush()
+    db.add(Payment(appointment_id=appointment.id, amount=100))
+    await db.flush()
+    return Seed(master, client, service, appointment)
+
+
+def _query_plans(call) -> list[tuple[str, str]]:
+    """
+    Выполняет call(db, seed) и возвращает для каждого SELECT,
+    который он отправил в БД, пару (SQL, EXPLAIN QUERY PLAN).
+    """
+    # Откаченные данные освобождают id — кэши воркера не должны подменять запросы
+    occupancy_cache.clear()
+    schedule_cache.clear()
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            seed = await _seed(db)
+            statements = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith("SELECT"):
+                    statements.append((statement, parameters))
+
+            event.listen(engine.sync_engine, "before_cursor_execute", capture)
+            try:
+                await call(db, seed)
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+            connection = await db.connection()
+            plans = []
+            for statement, parameters in statements:
+                result = await connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+                plans.append((statement, "\n".join(row[-1] for row in result)))
+            await db.rollback()
+            return plans
+
+    return run(scenario())
+
+
+async def _export(db, seed):
+    async for _ in stream_appointments_export(db, DAY, DAY, seed.master.id):
+        pass
+
+
+LIST_FILTER = AppointmentListFilter(date_from=DAY, date_to=DAY, limit=20)
+PAGE_FILTER = AppointmentListFilter(after=(DAY, 1, 1), limit=20)
+
+READ_PATHS = {
+    "get_user_by_login": lambda db, seed: get_user_by_login(db, seed.client.login),
+    "get_user_by_id": lambda db, seed: get_user_by_id(db, seed.client.id),
+    "get_all_masters": lambda db, seed: get_all_masters(db),
+    "get_all_services": lambda db, seed: get_all_services(db),
+    "get_services_by_master_id": lambda db, seed: get_services_by_master_id(db, seed.master.id),
+    "get_services_by_ids": lambda db, seed: get_services_by_ids(db, [seed.service.id]),
+    "get_all_appointments": lambda db, seed: get_all_appointments(db, LIST_FILTER),
+    "get_all_appointments_page": lambda db, seed: get_all_appointments(db, PAGE_FILTER),
+    "get_appointments_by_client": lambda db, seed: get_appointments_by_client(db, seed.client.id, LIST_FILTER),
+    "get_appointments_by_master": lambda db, seed: get_appointments_by_master(db, seed.master.id, LIST_FILTER),
+    "get_appointment_details": lambda db, seed: get_appointment_details(db, seed.appointment.id),
+    "get_appointments_details": lambda db, seed: get_appointments_details(db, [seed.appointment.id]),
+    "get_appointment_by_id": lambda db, seed: get_appointment_by_id(db, seed.appointment.id),
+    "get_appointments_by_master_and_date": lambda db, seed: get_appointments_by_master_and_date(db, seed.master.id, DAY),
+    "get_master_calendar": lambda db, seed: get_master_calendar(db, seed.master.id, DAY, DAY),
+    "stream_appointments_export": _export,
+    "validate_appointment": lambda db, seed: validate_appointment(db, seed.service.id, DAY, 1, 2),
+    "get_free_quarters": lambda db, seed: get_free_quarters(db, seed.service.id, DAY),
+    "get_payments_by_master": lambda db, seed: get_payments_by_master(db, seed.master.id),
+    "get_master_day_mask": lambda db, seed: get_master_day_mask(db, seed.master.id, DAY),
+    "get_master_day_masks": lambda db, seed: get_master_day_masks(db, [seed.master.id], DAY, DAY),
+    "get_working_calendars": lambda db, seed: get_working_calendars(db, [seed.master.id], DAY, DAY),
+    "get_weekly_schedule": lambda db, seed: get_weekly_schedule(db, seed.master.id),
+    "get_schedule_exceptions": lambda db, seed: get_schedule_exceptions(db, seed.master.id, DAY, DAY),
+    "get_services_availability": lambda db, seed: get_services_availability(db, [seed.service], DAY, DAY),
+    "find_earliest_slots": lambda db, seed: find_earliest_slots(db, "STYLIST", "Haircut", DAY, DAY, 10),
+    "find_combo_chains": lambda db, seed: find_combo_chains(db, [seed.service], DAY, DAY, 10),
+}
+
+
+@pytest.mark.parametrize("name", list(READ_PATHS))
+def test_read_path_uses_indexes(name):
+    plans = _query_plans(READ_PATHS[name])
+    assert plans, f"{name} sent no SELECT"
+    allowed = ALLOWED_SCANS.get(name, set())
+    for statement, plan in plans:
+        scanned = set(re.findall(r"\bSCAN (\w+)", plan)) - allowed
+        assert not scanned, f"{name}: full scan of {scanned}\n{statement}\n{plan}"
+
+
+def _plan_for(plans: list[tuple[str, str]], *fragments: str) -> str:
+    for statement, plan in plans:
+        if all(fragment in statement for fragment in fragments):
+            return plan
+    raise AssertionError(f"No query with {fragments} among {[statement for statement, _ in plans]}")
+
+
+def test_master_lists_use_master_index():
+    for name in ("get_appointments_by_master_and_date", "get_appointments_by_master", "get_master_calendar"):
+        plan = _plan_for(_query_plans(READ_PATHS[name]), "FROM appointments", "appointments.master_id")
+        assert "ix_appointments_master_date_quarter" in plan, plan
+
+
+def test_client_list_uses_client_index():
+    plan = _plan_for(_query_plans(READ_PATHS["get_appointments_by_client"]), "FROM appointments", "appointments.client_id")
+    assert "ix_appointments_client_date_quarter" in plan, plan
+
+
+def test_overlap_check_uses_master_index():
+    async def call(db, seed):
+        is_valid, _ = await validate_appointment(db, seed.service.id, DAY, 1, 2)
+        assert not is_valid
+
+    plan = _plan_for(_query_plans(call), "FROM appointments", "appointments.quarter <=")
+    assert "ix_appointments_master_date_quarter" in plan, plan
+
+
+def test_occupancy_lookup_uses_primary_key():
+    async def call(db, seed):
+        assert await get_master_day_mask(db, seed.master.id, DAY) == 0b11
+
+    plan = _plan_for(_query_plans(call), "FROM master_day_occupancy")
+    assert "sqlite_autoindex_master_day_occupancy" in plan, plan
+
+
+def test_master_list_uses_role_index():
+    plan = _plan_for(_query_plans(READ_PATHS["get_all_masters"]), "FROM users")
+    assert "ix_users_role" in plan, plan
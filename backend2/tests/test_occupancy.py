@@ -0,0 +1,59 @@
+"""
+Пересчет масок занятости при изменении и удалении услуги:
+пересчитываются только дни с сегодняшнего, история не блокируется.
+"""
+import uuid
+from datetime import date, timedelta
+
+from conftest import run
+from src.crud.occupancy import get_master_day_mask
+from src.crud.service import delete_service, update_service
+from src.database import AsyncSessionLocal
+from src.models.appointment import Appointment
+from src.models.occupancy import MasterDayOccupancy
+from src.models.service import Service
+from src.models.user import User
+from src.schemas.service import ServiceUpdate
+
+PAST = date.today() - timedelta(days=30)
+FUTURE = date.today() + timedelta(days=30)
+
+
+async def _seed(db) -> tuple[int, int]:
+    """Услуга длительностью 1 квартал с записями на PAST и FUTURE; (master_id, service_id)"""
+    suffix = uuid.uuid4().hex[:8]
+    master = User(login=f"master-{suffix}", password_hash="-", full_name="Master", phone_number="1", role="STYLIST")
+    client = User(login=f"client-{suffix}", password_hash="-", full_name="Client", phone_number="2", role="CLIENT")
+    db.add_all([master, client])
+    await db.flush()
+    service = Service(title="Haircut", duration_quarters=1, price=100, master_id=master.id)
+    db.add(service)
+    await db.flush()
+    for day in (PAST, FUTURE):
+        db.add(Appointment(client_id=client.id, service_id=service.id, master_id=master.id, date=day, quarter=1))
+        db.add(MasterDayOccupancy(master_id=master.id, date=day, mask=0b1))
+    await db.flush()
+    return master.id, service.id
+
+
+def test_update_service_rebuilds_days_from_today():
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            master_id, service_id = await _seed(db)
+            await update_service(db, service_id, ServiceUpdate(duration_quarters=3))
+            assert await get_master_day_mask(db, master_id, FUTURE) == 0b111
+            assert await get_master_day_mask(db, master_id, PAST) == 0b1
+            await db.rollback()
+
+    run(scenario())
+
+
+def test_delete_service_rebuilds_days_from_today():
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            master_id, service_id = await _seed(db)
+            assert await delete_service(db, service_id)
+            assert await get_master_day_mask(db, master_id, FUTURE) == 0
+            await db.rollback()
+
+    run(scenario())
@@ -0,0 +1,105 @@
+"""
+Пулы соединений воркера: без реплики чтения идут через пул основной БД,
+запрос записи не держит два соединения, ожидание соединения измеряется.
+"""
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from conftest import BACKEND_DIR, PRIMARY_DB, run
+
+
+def _run_without_replica(code: str) -> str:
+    env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{PRIMARY_DB}"}
+    env.pop("DATABASE_REPLICA_URL", None)
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_reads_share_primary_pool_without_replica():
+    output = _run_without_replica("""
+        from src.database import ReadSessionLocal, engine, read_engine
+        from src.pool import _pool_stats
+        bind = ReadSessionLocal.kw["bind"]
+        print(read_engine is None, bind.sync_engine.pool is engine.sync_engine.pool, list(_pool_stats) == [engine])
+    """)
+    assert output == "True True True"
+
+
+def test_write_request_holds_one_connection_without_replica():
+    output = _run_without_replica("""
+        import asyncio, uuid
+        import httpx
+        from sqlalchemy import event
+        from src.database import engine
+        from src.main import app
+
+        checked_out = 0
+        peak = 0
+
+        @event.listens_for(engine.sync_engine, "checkout")
+        def on_checkout(*args):
+            global checked_out, peak
+            checked_out += 1
+            peak = max(peak, checked_out)
+
+        @event.listens_for(engine.sync_engine, "checkin")
+        def on_checkin(*args):
+            global checked_out
+            checked_out -= 1
+
+        async def main():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/api/auth/register", json={
+                    "login": f"user-{uuid.uuid4().hex[:8]}", "password": "secret",
+                    "full_name": "Name", "phone_number": "1",
+                })
+                headers = {"Authorization": "Bearer " + response.json()["access_token"]}
+                global peak
+                peak = 0
+                response = await client.put("/api/users/me", json={"full_name": "New"}, headers=headers)
+                assert response.status_code == 200, response.text
+            await engine.dispose()
+
+        asyncio.run(main())
+        print(peak)
+    """)
+    assert output == "1"
+
+
+def test_pool_reports_wait_time_and_checkout_timeouts():
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    from src.pool import get_pool_stats, instrument_pool
+
+    async def scenario():
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{PRIMARY_DB}",
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.1,
+        )
+        instrument_pool(engine)
+        for _ in range(2):
+            async with engine.connect():
+                with pytest.raises(PoolTimeoutError):
+                    await engine.connect()
+            # Новый пул после dispose() тоже измеряется
+            await engine.dispose()
+        return get_pool_stats(engine, 0)
+
+    stats = run(scenario())
+    assert stats["checkout_timeouts"] == 2
+    assert stats["wait_time_max_ms"] >= 100
+    assert stats["checkouts"] == 2
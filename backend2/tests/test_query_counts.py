@@ -0,0 +1,47 @@
+"""
+Число SQL запросов на эндпоинты списков (заголовок X-DB-Queries):
+связанные записи загружаются пачкой, а не запросом на строку.
+"""
+import uuid
+
+import httpx
+
+from conftest import run, replicate
+from src.auth import create_access_token
+from src.database import AsyncSessionLocal
+from src.main import app
+from src.models.service import Service
+from src.models.user import User
+
+
+async def _seed_masters(count: int) -> str:
+    """Создает count мастеров с услугой и клиента; возвращает токен клиента"""
+    suffix = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        client = User(login=f"client-{suffix}", password_hash="-", full_name="Client", phone_number="1", role="CLIENT")
+        masters = [
+            User(login=f"master-{suffix}-{index}", password_hash="-", full_name="Master", phone_number="1", role="STYLIST")
+            for index in range(count)
+        ]
+        db.add_all([client, *masters])
+        await db.flush()
+        db.add_all(
+            Service(title="Haircut", duration_quarters=2, price=100, master_id=master.id)
+            for master in masters
+        )
+        await db.commit()
+    return create_access_token({"sub": client.login})
+
+
+def test_service_list_loads_masters_in_one_query():
+    async def scenario():
+        token = await _seed_masters(12)
+        replicate()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/services", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        # Пользователь из токена, услуги, мастера услуг
+        assert int(response.headers["X-DB-Queries"]) == 3
+
+    run(scenario())
@@ -0,0 +1,141 @@
+import sqlite3
+import time
+import uuid
+
+import httpx
+
+from conftest import PRIMARY_DB, run, replicate
+from src import database
+from src.database import READ_YOUR_WRITES_COOKIE
+from src.main import app
+
+
+def _client() -> httpx.AsyncClient:
+    # Отдельный клиент — отдельный браузер/воркер без общих cookie
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def _register(client: httpx.AsyncClient) -> tuple[str, dict, httpx.Response]:
+    login = f"user-{uuid.uuid4().hex[:8]}"
+    response = await client.post("/api/auth/register", json={
+        "login": login,
+        "password": "secret",
+        "full_name": "Original Name",
+        "phone_number": "1",
+    })
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return login, headers, response
+
+
+def _rename_on_primary(login: str, full_name: str) -> None:
+    connection = sqlite3.connect(PRIMARY_DB)
+    try:
+        connection.execute("UPDATE users SET full_name = ? WHERE login = ?", (full_name, login))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _forget_recent_writes() -> None:
+    # Запрос попадает на другой воркер: его память об изменениях пуста
+    database._recent_writers.clear()
+
+
+def test_reads_go_to_replica():
+    async def scenario():
+        async with _client() as client:
+            login, headers, _ = await _register(client)
+        replicate()
+        _rename_on_primary(login, "Changed On Primary")
+        _forget_recent_writes()
+
+        async with _client() as client:
+            response = await client.get("/api/users/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["full_name"] == "Original Name"
+
+    run(scenario())
+
+
+def test_write_sets_read_your_writes_cookie():
+    async def scenario():
+        async with _client() as client:
+            _, _, response = await _register(client)
+        until = float(response.cookies[READ_YOUR_WRITES_COOKIE])
+        assert time.time() < until <= time.time() + database.settings.REPLICA_READ_YOUR_WRITES_SECONDS + 1
+
+    run(scenario())
+
+
+def test_read_only_request_sets_no_cookie():
+    async def scenario():
+        async with _client() as client:
+            _, headers, _ = await _register(client)
+        replicate()
+        async with _client() as client:
+            response = await client.get("/api/users/me", headers=headers)
+        assert READ_YOUR_WRITES_COOKIE not in response.cookies
+
+    run(scenario())
+
+
+def test_cookie_routes_reads_to_primary_on_another_worker():
+    async def scenario():
+        async with _client() as client:
+            _, headers, response = await _register(client)
+            cookie = response.cookies[READ_YOUR_WRITES_COOKIE]
+            response = await client.put(
+                "/api/users/me",
+                json={"full_name": "Updated Name"},
+                headers={**headers, "Cookie": f"{READ_YOUR_WRITES_COOKIE}={cookie}"},
+            )
+            assert response.status_code == 200
+            cookie = response.cookies[READ_YOUR_WRITES_COOKIE]
+        _forget_recent_writes()
+
+        async with _client() as client:
+            # Реплика пользователя еще не видела — без cookie он даже не аутентифицируется
+            response = await client.get("/api/users/me", headers=headers)
+            assert response.status_code == 401
+
+            response = await client.get(
+                "/api/users/me",
+                headers={**headers, "Cookie": f"{READ_YOUR_WRITES_COOKIE}={cookie}"},
+            )
+        assert response.status_code == 200
+        assert response.json()["full_name"] == "Updated Name"
+
+    run(scenario())
+
+
+def test_same_worker_reads_primary_without_cookie():
+    async def scenario():
+        async with _client() as client:
+            _, headers, _ = await _register(client)
+        async with _client() as client:
+            response = await client.get("/api/users/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["full_name"] == "Original Name"
+
+    run(scenario())
+
+
+def test_expired_or_far_future_cookie_is_ignored():
+    async def scenario():
+        async with _client() as client:
+            login, headers, _ = await _register(client)
+        replicate()
+        _rename_on_primary(login, "Changed On Primary")
+        _forget_recent_writes()
+
+        async with _client() as client:
+            for until in (time.time() - 1, time.time() + 3600, "garbage"):
+                response = await client.get(
+                    "/api/users/me",
+                    headers={**headers, "Cookie": f"{READ_YOUR_WRITES_COOKIE}={until}"},
+                )
+                assert response.status_code == 200
+                assert response.json()["full_name"] == "Original Name"
+
+    run(scenario())
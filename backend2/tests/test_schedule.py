@@ -0,0 +1,74 @@
+"""
+Рабочие календари мастеров: бронирование читает календарь из своей транзакции,
+а кэш воркера используют только эндпоинты чтения.
+"""
+import uuid
+from datetime import date
+
+from conftest import run
+from src.crud.appointment import OUTSIDE_SCHEDULE_MESSAGE, validate_appointment
+from src.crud.schedule import DEFAULT_CALENDAR, get_working_calendars, schedule_cache
+from src.database import AsyncSessionLocal
+from src.models.schedule import MasterScheduleException
+from src.models.service import Service
+from src.models.user import User
+
+DAY = date(2030, 1, 15)
+
+
+async def _seed_master_with_day_off() -> tuple[int, int]:
+    """Мастер с услугой и выходным DAY; возвращает (master_id, service_id)"""
+    suffix = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        master = User(login=f"master-{suffix}", password_hash="-", full_name="Master", phone_number="1", role="STYLIST")
+        db.add(master)
+        await db.flush()
+        service = Service(title="Haircut", duration_quarters=2, price=100, master_id=master.id)
+        db.add(service)
+        db.add(MasterScheduleException(master_id=master.id, date=DAY, working_mask=0))
+        await db.commit()
+        return master.id, service.id
+
+
+async def _cache_stale_calendar(master_id: int) -> None:
+    # Календарь, закэшированный воркером до того, как другой воркер сохранил выходной
+    async def load(missing):
+        return {key: DEFAULT_CALENDAR for key in missing}
+
+    await schedule_cache.get_many_or_load([master_id], load)
+
+
+def test_booking_ignores_cached_calendar():
+    async def scenario():
+        master_id, service_id = await _seed_master_with_day_off()
+        await _cache_stale_calendar(master_id)
+        async with AsyncSessionLocal() as db:
+            is_valid, error = await validate_appointment(db, service_id, DAY, 1, 2)
+        assert not is_valid
+        assert error == OUTSIDE_SCHEDULE_MESSAGE
+
+    run(scenario())
+
+
+def test_read_sessions_use_cached_calendar():
+    async def scenario():
+        master_id, _ = await _seed_master_with_day_off()
+        await _cache_stale_calendar(master_id)
+        async with AsyncSessionLocal() as db:
+            db.info["read_only"] = True
+            calendars = await get_working_calendars(db, [master_id], DAY, DAY)
+        assert calendars[master_id] is DEFAULT_CALENDAR
+
+    run(scenario())
+
+
+def test_calendar_loads_exceptions_of_window_only():
+    async def scenario():
+        master_id, _ = await _seed_master_with_day_off()
+        async with AsyncSessionLocal() as db:
+            calendars = await get_working_calendars(db, [master_id], date(2030, 2, 1), date(2030, 2, 28))
+            assert calendars[master_id].exceptions == {}
+            calendars = await get_working_calendars(db, [master_id], DAY, DAY)
+            assert calendars[master_id].exceptions == {DAY: 0}
+
+    run(scenario())
@@ -0,0 +1,62 @@
+"""
+Журнал медленных запросов: свой файл у каждого воркера, EXPLAIN ограничены.
+Порог журнала задается при импорте src, поэтому проверки идут в отдельном процессе.
+"""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from conftest import BACKEND_DIR, PRIMARY_DB, TMP_DIR
+
+SCRIPT = """
+    import asyncio, json, os
+    from sqlalchemy import text
+    from src.database import engine
+    from src.slow_query_log import _explain_tasks, read_slow_queries
+
+    async def main():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT id FROM users WHERE id = 1"))
+        while _explain_tasks:
+            await asyncio.sleep(0.01)
+        await engine.dispose()
+
+    asyncio.run(main())
+    print(json.dumps({"pid": os.getpid(), "records": read_slow_queries(10)}))
+"""
+
+
+def _run(log_name: str, **env_overrides) -> tuple[str, dict]:
+    log_path = os.path.join(TMP_DIR, log_name)
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{PRIMARY_DB}",
+        "SLOW_QUERY_THRESHOLD_MS": "0.000001",
+        "SLOW_QUERY_LOG_PATH": log_path,
+        **env_overrides,
+    }
+    env.pop("DATABASE_REPLICA_URL", None)
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(SCRIPT)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return log_path, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_each_worker_writes_its_own_log():
+    log_path, output = _run("slow.log")
+    root, extension = os.path.splitext(log_path)
+    assert os.path.exists(f"{root}.{output['pid']}{extension}")
+    assert not os.path.exists(log_path)
+    record = next(record for record in output["records"] if "FROM users" in record["statement"])
+    assert record["explain"]
+
+
+def test_explain_over_concurrency_limit_is_skipped():
+    _, output = _run("skipped.log", SLOW_QUERY_EXPLAIN_CONCURRENCY="0")
+    record = next(record for record in output["records"] if "FROM users" in record["statement"])
+    assert record["explain_skipped"] is True
+    assert "explain" not in record
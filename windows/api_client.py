@@ -22,6 +22,9 @@ class APIClient:
     def __init__(self):
         self.token: Optional[str] = None
         self.user: Optional[Dict[str, Any]] = None
+        # Сессия хранит cookie сервера: после изменений следующие чтения
+        # идут в основную БД, на каком бы воркере они ни оказались
+        self.session = requests.Session()
     
     def _get_headers(self, include_auth: bool = True) -> Dict[str, str]:
         """Получить заголовки для запроса"""
@@ -72,7 +75,7 @@ class APIClient:
             "phone_number": phone_number,
             "role": role
         }
-        response = requests.post(url, json=data, headers=self._get_headers(include_auth=False))
+        response = self.session.post(url, json=data, headers=self._get_headers(include_auth=False))
         result = self._handle_response(response)
         self.token = result["access_token"]
         self.user = result["user"]
@@ -93,7 +96,7 @@ class APIClient:
             "accept": "application/json",
             "Content-Type": "application/x-www-form-urlencoded"
         }
-        response = requests.post(url, data=data, headers=headers)
+        response = self.session.post(url, data=data, headers=headers)
         result = self._handle_response(response)
         self.token = result["access_token"]
         self.user = result["user"]
@@ -102,20 +105,21 @@ class APIClient:
     def get_current_user(self) -> Dict[str, Any]:
         """Получить информацию о текущем пользователе"""
         url = f"{self.BASE_URL}/api/users/me"
-        response = requests.get(url, headers=self._get_headers())
+        response = self.session.get(url, headers=self._get_headers())
         return self._handle_response(response)
     
     def logout(self):
         """Выход (очистка токена)"""
         self.token = None
         self.user = None
+        self.session.cookies.clear()
     
     # ========== Услуги ==========
     
     def get_services(self) -> List[Dict[str, Any]]:
         """Получить список всех услуг"""
         url = f"{self.BASE_URL}/api/services"
-        response = requests.get(url, headers=self._get_headers())
+        response = self.session.get(url, headers=self._get_headers())
         return self._handle_response(response)
     
     def get_master_services(self, master_id: Optional[int] = None) -> List[Dict[str, Any]]:
@@ -124,13 +128,13 @@ class APIClient:
             url = f"{self.BASE_URL}/api/services/masters/{master_id}"
         else:
             url = f"{self.BASE_URL}/api/services/masters/me"
-        response = requests.get(url, headers=self._get_headers())
+        response = self.session.get(url, headers=self._get_headers())
         return self._handle_response(response)
     
     def get_service(self, service_id: int) -> Dict[str, Any]:
         """Получить услугу по ID"""
         url = f"{self.BASE_URL}/api/services/{service_id}"
-        response = requests.get(url, headers=self._get_headers())
+        response = self.session.get(url, headers=self._get_headers())
         return self._handle_response(response)
     
     def create_service(self, title: str, duration_quarters: int, price: float, master_id: int) -> Dict[str, Any]:
@@ -142,7 +146,7 @@ class APIClient:
             "price": str(price),
             "master_id": master_id
         }
-        response = requests.post(url, json=data, headers=self._get_headers())
+        response = self.session.post(url, json=data, headers=self._get_headers())
         return self._handle_response(response)
     
     def update_service(self, service_id: int, title: Optional[str] = None,
@@ -160,20 +164,20 @@ class APIClient:
             data["price"] = str(price)
         if master_id is not None:
             data["master_id"] = master_id
-        response = requests.put(url, json=data, headers=self._get_headers())
+        response = self.session.put(url, json=data, headers=self._get_headers())
         return self._handle_response(response)
     
     def delete_service(self, service_id: int):
         """Удалить услугу"""
         url = f"{self.BASE_URL}/api/services/{service_id}"
-        response = requests.delete(url, headers=self._get_headers())
+        response = self.session.delete(url, headers=self._get_headers())
         self._handle_response(response)
     
     def get_free_quarters(self, service_id: int, date_str: str) -> List[int]:
         """Получить свободные кварталы для услуги"""
         url = f"{self.BASE_URL}/api/services/{service_id}/free_quarters"
         params = {"date": date_str}
-        response = requests.get(url, params=params, headers=self._get_headers())
+        response = self.session.get(url, params=params, headers=self._get_headers())
         result = self._handle_response(response)
         return result.get("free_quarters", [])
     
@@ -182,19 +186,22 @@ class APIClient:
     def get_appointments(self) -> List[Dict[str, Any]]:
         """Получить список всех записей"""
         url = f"{self.BASE_URL}/api/appointments"
-        response = requests.get(url, headers=self._get_headers())
+        response = self.session.get(url, headers=self._get_headers())
         return self._handle_response(response)
     
-    def get_master_appointments(self) -> List[Dict[str, Any]]:
-        """Получить записи текущего мастера"""
+    def get_master_appointments(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Получить записи текущего мастера (отсортированы по дате и времени)"""
         url = f"{self.BASE_URL}/api/appointments/master"
-        response = requests.get(url, headers=self._get_headers())
+        params = {}
+        if status:
+            params["status"] = status
+        response = self.session.get(url, params=params, headers=self._get_headers())
         return self._handle_response(response)
     
     def get_client_appointments(self) -> List[Dict[str, Any]]:
         """Получить записи текущего клиента"""
         url = f"{self.BASE_URL}/api/appointments/client"
-        response = requests.get(url, headers=self._get_headers())
+        response = self.session.get(url, headers=self._get_headers())
         return self._handle_response(response)
     
     def get_appointment(self, appointment_id: int) -> Dict[str, Any]:
@@ -210,7 +217,7 @@ class APIClient:
         print(f"Headers: {json.dumps(headers, indent=2, ensure_ascii=False)}")
         print("=" * 50)
         
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url, headers=headers)
         
         # Выводим ответ
         print(f"Status Code: {response.status_code}")
@@ -231,33 +238,42 @@ class APIClient:
             "status": status,
             "is_paid": is_paid
         }
-        response = requests.post(url, json=data, headers=self._get_headers())
+        response = self.session.post(url, json=data, headers=self._get_headers())
         return self._handle_response(response)
     
     def delete_appointment(self, appointment_id: int):
         """Удалить запись"""
         url = f"{self.BASE_URL}/api/appointments/{appointment_id}"
-        response = requests.delete(url, headers=self._get_headers())
+        response = self.session.delete(url, headers=self._get_headers())
         self._handle_response(response)
     
-    def update_appointment_status(self, appointment_id: int, status: str) -> Dict[str, Any]:
-        """Обновить статус записи"""
+    def _version_headers(self, version: Optional[int]) -> Dict[str, str]:
+        """Заголовки с ожидаемой версией записи: если запись успели изменить, сервер вернет 409"""
+        headers = self._get_headers()
+        if version is not None:
+            headers["If-Match"] = f'"{version}"'
+        return headers
+    
+    def update_appointment_status(self, appointment_id: int, status: str,
+                                  version: Optional[int] = None) -> Dict[str, Any]:
+        """Обновить статус записи (version — версия записи из списка или карточки)"""
         url = f"{self.BASE_URL}/api/appointments/{appointment_id}"
         # Отправляем только status
         data = {
             "status": status
         }
-        response = requests.put(url, json=data, headers=self._get_headers())
+        response = self.session.put(url, json=data, headers=self._version_headers(version))
         return self._handle_response(response)
     
-    def update_appointment_paid(self, appointment_id: int, is_paid: bool) -> Dict[str, Any]:
-        """Обновить статус оплаты записи"""
+    def update_appointment_paid(self, appointment_id: int, is_paid: bool,
+                                version: Optional[int] = None) -> Dict[str, Any]:
+        """Обновить статус оплаты записи (version — версия записи из списка или карточки)"""
         url = f"{self.BASE_URL}/api/appointments/{appointment_id}"
         # Отправляем только is_paid, как в curl запросе
         data = {
             "is_paid": is_paid
         }
-        headers = self._get_headers()
+        headers = self._version_headers(version)
         
         # Выводим информацию о запросе в консоль
         import json
@@ -268,7 +284,7 @@ class APIClient:
         print(f"Data: {json.dumps(data, indent=2, ensure_ascii=False)}")
         print("=" * 50)
         
-        response = requests.put(url, json=data, headers=headers)
+        response = self.session.put(url, json=data, headers=headers)
         
         # Выводим ответ
         print(f"Status Code: {response.status_code}")
@@ -277,12 +293,22 @@ class APIClient:
         
         return self._handle_response(response)
     
+    def settle_appointment(self, appointment_id: int, amount: Optional[float] = None) -> Dict[str, Any]:
+        """Оплатить запись: отметка об оплате и оплата создаются одним запросом.
+        Без amount сумма равна цене услуги."""
+        url = f"{self.BASE_URL}/api/appointments/{appointment_id}/settle"
+        data = {}
+        if amount is not None:
+            data["amount"] = str(amount)
+        response = self.session.post(url, json=data, headers=self._get_headers())
+        return self._handle_response(response)
+    
     # ========== Оплаты ==========
     
     def get_master_payments(self) -> List[Dict[str, Any]]:
         """Получить оплаты текущего мастера"""
         url = f"{self.BASE_URL}/api/payments/me"
-        response = requests.get(url, headers=self._get_headers())
+        response = self.session.get(url, headers=self._get_headers())
         return self._handle_response(response)
     
     def create_payment(self, appointment_id: int, amount: float) -> Dict[str, Any]:
@@ -303,7 +329,7 @@ class APIClient:
         print(f"Data: {json.dumps(data, indent=2, ensure_ascii=False)}")
         print("=" * 50)
         
-        response = requests.post(url, json=data, headers=headers)
+        response = self.session.post(url, json=data, headers=headers)
         
         # Выводим ответ
         print(f"Status Code: {response.status_code}")
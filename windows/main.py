@@ -319,8 +319,16 @@ class HomePage(QWidget):
             if child.widget():
                 child.widget().deleteLater()
         
+        # Фильтр по статусу применяется на сервере
+        status_map = {
+            "Забронировано": "booked",
+            "В процессе": "in_progress",
+            "Завершено": "completed"
+        }
+        filter_status = status_map.get(self.status_filter.currentText())
+        
         try:
-            appointments = self.api_client.get_master_appointments()
+            appointments = self.api_client.get_master_appointments(status=filter_status)
         except APIError as e:
             QMessageBox.warning(self, "Ошибка", e.message)
             return
@@ -337,22 +345,8 @@ class HomePage(QWidget):
             self.appointments_layout.addStretch()
             return
         
-        # Фильтруем по статусу
-        filter_text = self.status_filter.currentText()
-        if filter_text != "Все":
-            status_map = {
-                "Забронировано": "booked",
-                "В процессе": "in_progress",
-                "Завершено": "completed"
-            }
-            filter_status = status_map.get(filter_text)
-            if filter_status:
-                appointments = [a for a in appointments if a["status"] == filter_status]
-        
-        # Сортируем по дате и времени
-        appointments_sorted = sorted(appointments, key=lambda a: (a["date"], a["quarter"]))
-        
-        for appointment in appointments_sorted:
+        # Сервер возвращает записи, отсортированные по дате и времени
+        for appointment in appointments:
             # Создаем карточку записи
             card = QFrame()
             card.setStyleSheet(f"background-color: {CARD}; border: 1px solid {BORDER}; border-radius: 8px; padding: 8px;")
@@ -429,7 +423,8 @@ class HomePage(QWidget):
             status_combo.setCurrentText(status_text)
             status_combo.setStyleSheet("font-size: 11px; padding: 4px; min-height: 24px;")
             status_combo.currentTextChanged.connect(
-                lambda text, app_id=appointment["id"]: self.update_status(app_id, text)
+                lambda text, app_id=appointment["id"], version=appointment["version"]:
+                    self.update_status(app_id, text, version)
             )
             
             right_controls.addWidget(status_combo)
@@ -454,7 +449,7 @@ class HomePage(QWidget):
         
         self.appointments_layout.addStretch()
     
-    def update_status(self, appointment_id: int, status_text: str):
+    def update_status(self, appointment_id: int, status_text: str, version: int):
         status_map = {
             "Забронировано": "booked",
             "В процессе": "in_progress",
@@ -463,30 +458,38 @@ class HomePage(QWidget):
         status = status_map.get(status_text)
         if status:
             try:
-                self.api_client.update_appointment_status(appointment_id, status)
+                self.api_client.update_appointment_status(appointment_id, status, version)
                 self.load_appointments()
             except APIError as e:
+                if e.status_code == 409:
+                    self.show_conflict()
+                    return
                 QMessageBox.warning(self, "Ошибка", e.message)
             except Exception as e:
                 QMessageBox.critical(self, "Ошибка", f"Произошла ошибка: {str(e)}")
     
     def toggle_payment(self, appointment_id: int):
         try:
-            # Получаем текущую запись для получения цены услуги
-            appointment = self.api_client.get_appointment(appointment_id)
-            
-            # Устанавливаем оплату
-            self.api_client.update_appointment_paid(appointment_id, True)
-            
-            # Создаем запись об оплате
-            amount = float(appointment["service_price"])
-            self.api_client.create_payment(appointment_id, amount)
+            # Отметка об оплате и оплата на цену услуги создаются на сервере одной транзакцией
+            self.api_client.settle_appointment(appointment_id)
             
             self.load_appointments()
         except APIError as e:
+            if e.status_code == 409:
+                self.show_conflict()
+                return
             QMessageBox.warning(self, "Ошибка", f"{e.message} (Код: {e.status_code})")
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Произошла ошибка: {str(e)}")
+    
+    def show_conflict(self):
+        # Запись уже изменили (например, мастер и администратор одновременно):
+        # показываем актуальное состояние, чтобы изменение сделали поверх него
+        QMessageBox.information(
+            self, "Запись изменена",
+            "Запись уже изменил другой пользователь. Список обновлен, повторите действие."
+        )
+        self.load_appointments()
 
 
 class ServicesPage(QWidget):